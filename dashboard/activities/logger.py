@@ -5,19 +5,132 @@ Activity logging service for tracking user activities.
 
 import sys
 import os
+import time
+import queue
+import atexit
 import logging
 import threading
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+
+from sqlalchemy.exc import InterfaceError, OperationalError
 
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, project_root)
 
-from dashboard.tickets.models import ActivityLog, get_session
+from dashboard.tickets.models import add_activity_logs_bulk
 
 logger = logging.getLogger(__name__)
 
 
+# Queued by close() to wake the writer thread and tell it to exit
+_STOP = object()
+
+
+class ActivityLogWriter:
+    """
+    Background writer for activity log entries.
+    
+    Callers only queue entries; a daemon thread inserts them in batches (at
+    most `batch_size` rows, gathered for up to `interval` seconds) with one
+    executemany INSERT, keeping request handlers free of activity SQL.
+    """
+    
+    def __init__(self, interval: float = 1.0, batch_size: int = 500, join_timeout: float = 10.0):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.join_timeout = join_timeout
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+    
+    def submit(self, entry: Dict[str, Any]):
+        """Queue an entry (starts the writer thread on first use)"""
+        self._queue.put(entry)
+        with self._lock:
+            if self._closed:
+                return  # close() writes whatever is still queued
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='activity-log-writer', daemon=True)
+                self._thread.start()
+    
+    def close(self):
+        """
+        Stop the writer thread and write everything still queued (called at interpreter exit).
+        
+        The thread writes the batch it is holding before it exits, so entries
+        it already took off the queue are not lost.
+        """
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(self.join_timeout)
+        self._write(self._drain())
+    
+    def _drain(self) -> List[Dict[str, Any]]:
+        batch = []
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                return batch
+            if entry is not _STOP:
+                batch.append(entry)
+    
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is _STOP:
+                return
+            batch = [entry]
+            stopping = False
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            self._write(batch)
+            if stopping:
+                return
+    
+    def _write(self, batch: List[Dict[str, Any]]):
+        """
+        Insert a batch, retrying it in halves if the insert fails.
+        
+        Splitting narrows a failure down to the rows that caused it, so one bad
+        entry doesn't drop the rest of its batch. Connection errors fail every
+        retry the same way, so those drop the batch without splitting.
+        """
+        if not batch:
+            return
+        try:
+            add_activity_logs_bulk(batch)
+        except Exception as e:
+            if len(batch) == 1 or isinstance(e, (OperationalError, InterfaceError)):
+                logger.error(f"Error logging {len(batch)} activities: {e}", exc_info=True)
+                return
+            logger.warning(f"Error logging {len(batch)} activities, retrying in smaller batches: {e}")
+            middle = len(batch) // 2
+            self._write(batch[:middle])
+            self._write(batch[middle:])
+
+
+# Global writer instance
+_activity_log_writer = ActivityLogWriter()
+atexit.register(_activity_log_writer.close)
+
+
 def log_activity(user_id: int, activity_type: str, entity_type: str, 
                  entity_id: Optional[int] = None, action: str = None, 
                  metadata: Optional[Dict[str, Any]] = None):
@@ -32,32 +145,16 @@ def log_activity(user_id: int, activity_type: str, entity_type: str,
         action: Action performed ('create', 'update', 'delete', 'login', 'logout', 'status_change', 'assign', etc.)
         metadata: Additional context as dictionary (will be stored as JSON)
     """
-    def _log():
-        try:
-            session = get_session()
-            try:
-                activity = ActivityLog(
-                    user_id=user_id,
-                    activity_type=activity_type,
-                    entity_type=entity_type,
-                    entity_id=entity_id,
-                    action=action or 'unknown',
-                    activity_metadata=metadata,  # Fixed: use activity_metadata not metadata
-                    created_at=datetime.utcnow()
-                )
-                session.add(activity)
-                session.commit()
-            except Exception as e:
-                session.rollback()
-                logger.error(f"Error logging activity: {e}", exc_info=True)
-            finally:
-                session.close()
-        except Exception as e:
-            logger.error(f"Error in activity logging thread: {e}", exc_info=True)
-    
-    # Log asynchronously to avoid blocking main operations
-    thread = threading.Thread(target=_log, daemon=True)
-    thread.start()
+    # Written in batches by the background writer to avoid blocking main operations
+    _activity_log_writer.submit({
+        'user_id': user_id,
+        'activity_type': activity_type,
+        'entity_type': entity_type,
+        'entity_id': entity_id,
+        'action': action or 'unknown',
+        'activity_metadata': metadata,
+        'created_at': datetime.utcnow()
+    })
 
 
 def log_ticket_activity(user_id: int, action: str, ticket_id: int, 
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the background activity log writer.
+"""
+
+import time
+import threading
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy.exc import OperationalError
+
+import sys
+import os
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, project_root)
+
+from dashboard.activities import logger as activity_logger
+from dashboard.activities.logger import ActivityLogWriter
+
+
+def _entry(n):
+    return {'user_id': 1, 'activity_type': 'ticket', 'entity_type': 'ticket', 'entity_id': n, 'action': 'update'}
+
+
+class TestActivityLogWriter(unittest.TestCase):
+    """Tests for ActivityLogWriter."""
+    
+    def setUp(self):
+        self.calls = []
+        self.written = []
+        self.bad_ids = set()
+        self.error = None
+        patcher = patch.object(activity_logger, 'add_activity_logs_bulk', self._fake_bulk)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def _fake_bulk(self, rows):
+        """Insert all rows or none, like the real executemany in one transaction."""
+        self.calls.append([row['entity_id'] for row in rows])
+        if self.error is not None:
+            raise self.error
+        if any(row['entity_id'] in self.bad_ids for row in rows):
+            raise ValueError('bad row')
+        self.written.extend(row['entity_id'] for row in rows)
+        return len(rows)
+    
+    def _wait_for_queue_to_empty(self, writer):
+        deadline = time.monotonic() + 5
+        while not writer._queue.empty():
+            self.assertLess(time.monotonic(), deadline, 'writer thread never took the entries')
+            time.sleep(0.01)
+    
+    def test_failed_batch_only_drops_bad_rows(self):
+        """Test a batch with bad rows is retried in smaller chunks and the good rows are kept."""
+        self.bad_ids = {3, 6}
+        writer = ActivityLogWriter()
+        writer._write([_entry(n) for n in range(8)])
+        self.assertEqual(sorted(self.written), [0, 1, 2, 4, 5, 7])
+        self.assertEqual(self.calls[0], list(range(8)))
+    
+    def test_connection_error_is_not_split(self):
+        """Test a batch failing with a connection error is dropped without retries."""
+        self.error = OperationalError('INSERT', {}, Exception('connection refused'))
+        writer = ActivityLogWriter()
+        writer._write([_entry(n) for n in range(8)])
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.written, [])
+    
+    def test_close_writes_the_batch_the_thread_is_holding(self):
+        """Test close() stops the thread and writes entries it already took off the queue."""
+        writer = ActivityLogWriter(interval=30)
+        for n in range(3):
+            writer.submit(_entry(n))
+        # The thread now holds all three, waiting out its 30 second interval
+        self._wait_for_queue_to_empty(writer)
+        thread = writer._thread
+        
+        started = time.monotonic()
+        writer.close()
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(self.written, [0, 1, 2])
+    
+    def test_close_writes_entries_still_queued(self):
+        """Test entries the thread never reached are written by close()."""
+        release = threading.Event()
+        
+        def slow_bulk(rows):
+            release.wait(5)
+            return self._fake_bulk(rows)
+        
+        writer = ActivityLogWriter(interval=0, batch_size=2)
+        with patch.object(activity_logger, 'add_activity_logs_bulk', slow_bulk):
+            for n in range(5):
+                writer.submit(_entry(n))
+            release.set()
+            writer.close()
+        self.assertEqual(sorted(self.written), [0, 1, 2, 3, 4])
+        self.assertTrue(all(len(call) <= 2 for call in self.calls[:-1]))
+    
+    def test_submit_after_close_does_not_start_a_thread(self):
+        """Test a closed writer leaves new entries queued instead of restarting the thread."""
+        writer = ActivityLogWriter()
+        writer.close()
+        writer.submit(_entry(1))
+        self.assertIsNone(writer._thread)
+        self.assertEqual(self.calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
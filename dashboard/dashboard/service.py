@@ -10,14 +10,14 @@ from datetime import date, timedelta, datetime
 from typing import Dict, List, Optional
 from calendar import monthrange
 from sqlalchemy import func, case
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, raiseload, selectinload
 
 # Add parent directories to path
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, project_root)
 
 from dashboard.tickets.models import (
-    Ticket, TicketTag, get_session, TICKET_STATUSES, TICKET_PRIORITIES
+    Ticket, TicketTag, TicketImage, get_session, TICKET_STATUSES, TICKET_PRIORITIES
 )
 from database.models import Reservation, Listing, get_session as get_main_session
 import dashboard.config as config
@@ -80,10 +80,15 @@ class DashboardService:
             # Get tickets assigned to user, excluding resolved/closed
             active_statuses = [s for s in TICKET_STATUSES if s not in ['Resolved', 'Closed']]
             
+            # to_dict() reads listings and images (with uploaders); selectinload
+            # fetches each of those for all tickets in one query
             tickets = self.ticket_session.query(Ticket).options(
                 joinedload(Ticket.assigned_user),
                 joinedload(Ticket.creator),
-                joinedload(Ticket.tags)
+                joinedload(Ticket.tags),
+                selectinload(Ticket.listings),
+                selectinload(Ticket.images).joinedload(TicketImage.uploader),
+                raiseload('*')
             ).filter(
                 Ticket.assigned_user_id == self.user_id,
                 Ticket.status.in_(active_statuses)
@@ -21,6 +21,8 @@ class ImageUploader {
             onDeleteComplete: options.onDeleteComplete || (() => {}),
             maxFiles: options.maxFiles || 10,
             maxFileSize: options.maxFileSize || 2 * 1024 * 1024, // 2MB
+            // Uploads processed at once; each is handled by its own server worker
+            maxConcurrentUploads: options.maxConcurrentUploads || 3,
             allowedTypes: options.allowedTypes || ['image/jpeg', 'image/jpg', 'image/png', 'image/webp', 'image/gif', 'image/heic', 'image/heif']
         };
         
@@ -148,10 +150,16 @@ class ImageUploader {
         this.isUploading = true;
         this.updateUploadArea();
         
-        while (this.uploadQueue.length > 0) {
-            const file = this.uploadQueue.shift();
-            await this.uploadFile(file);
-        }
+        // Each worker takes the next queued file until the queue is empty
+        // (files queued while uploading are picked up too)
+        const uploadWorker = async () => {
+            while (this.uploadQueue.length > 0) {
+                const file = this.uploadQueue.shift();
+                await this.uploadFile(file);
+            }
+        };
+        const workerCount = Math.min(this.options.maxConcurrentUploads, this.uploadQueue.length);
+        await Promise.all(Array.from({ length: workerCount }, uploadWorker));
         
         this.isUploading = false;
         this.updateUploadArea();
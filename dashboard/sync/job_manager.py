@@ -7,7 +7,7 @@ Uses database table sync_jobs for persistence.
 import uuid
 import threading
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional
 from threading import Lock
 from database.models import SyncJob, get_session
 from database.schema import get_database_path
@@ -19,6 +19,15 @@ class SyncJobManager:
     
     def __init__(self):
         self.lock = Lock()
+        self._state_version = 0
+    
+    @property
+    def state_version(self) -> int:
+        """Counter bumped on every job status change - lets callers invalidate cached views"""
+        return self._state_version
+    
+    def _bump_state_version(self):
+        self._state_version += 1
     
     def _job_to_dict(self, job: SyncJob) -> Dict:
         """Convert SyncJob model to dictionary format"""
@@ -72,6 +81,7 @@ class SyncJobManager:
             )
             session.add(job)
             session.commit()
+            self._bump_state_version()
         except Exception as e:
             session.rollback()
             raise
@@ -92,6 +102,7 @@ class SyncJobManager:
                     job.sync_run_id = sync_run_id
                     job.updated_at = datetime.utcnow()
                     session.commit()
+                    self._bump_state_version()
         except Exception as e:
             session.rollback()
             raise
@@ -184,6 +195,43 @@ class SyncJobManager:
                         job.completed_at = datetime.utcnow()
                     
                     session.commit()
+                    self._bump_state_version()
+        except Exception as e:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
+    def bulk_update_job_status(self, job_ids: Iterable[str], status: str, error_message: Optional[str] = None):
+        """
+        Update status for many jobs with a single UPDATE statement and one commit.
+        
+        Args:
+            job_ids: Job IDs to update
+            status: New status for all jobs
+            error_message: Optional error message to set on all jobs
+        """
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        
+        now = datetime.utcnow()
+        values = {'status': status, 'updated_at': now}
+        if error_message is not None:
+            values['error_message'] = error_message
+        if status in ('completed', 'error'):
+            values['completed_at'] = now
+        
+        db_path = get_database_path()
+        session = get_session(db_path)
+        
+        try:
+            with self.lock:
+                session.query(SyncJob).filter(
+                    SyncJob.job_id.in_(job_ids)
+                ).update(values, synchronize_session=False)
+                session.commit()
+                self._bump_state_version()
         except Exception as e:
             session.rollback()
             raise
@@ -202,11 +250,12 @@ class SyncJobManager:
                     progress = job.get_progress()
                     progress.update(progress_data)
                     
-                    # Calculate percentage
-                    if progress.get('total', 0) > 0:
-                        progress['percentage'] = (progress.get('processed', 0) / progress['total']) * 100
-                    else:
-                        progress['percentage'] = 0.0
+                    # Calculate percentage (unless the caller already did)
+                    if 'percentage' not in progress_data:
+                        if progress.get('total', 0) > 0:
+                            progress['percentage'] = (progress.get('processed', 0) / progress['total']) * 100
+                        else:
+                            progress['percentage'] = 0.0
                     
                     # Store current_item for display
                     if 'current_item' in progress_data:
@@ -243,6 +292,7 @@ class SyncJobManager:
                 for job in old_jobs:
                     session.delete(job)
                 session.commit()
+                self._bump_state_version()
         except Exception as e:
             session.rollback()
             raise
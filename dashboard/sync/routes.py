@@ -6,10 +6,21 @@ Sync dashboard API routes.
 import sys
 import os
 import json
+import gzip
 import threading
+import time
+import hashlib
 import logging
+from collections import OrderedDict, defaultdict
 from datetime import datetime
-from flask import Blueprint, render_template, jsonify, request
+from typing import Optional
+from flask import Blueprint, render_template, jsonify, request, current_app
+from sqlalchemy import case, func, select, text
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup, falls back to Flask's JSON provider
+    orjson = None
 
 # Add parent directories to path
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -22,12 +33,115 @@ from database.models import SyncLog, SyncJob, Listing, get_session
 from database.schema import get_database_path
 from sync.sync_manager import full_sync, incremental_sync
 from dashboard.sync.job_manager import get_job_manager
-from dashboard.sync.web_progress import WebProgressTracker
+from dashboard.sync.web_progress import WebProgressTracker, get_live_progress
 from dashboard.auth.decorators import approved_required, admin_required
 import dashboard.config as config
 
 sync_bp = Blueprint('sync', __name__, url_prefix='/sync')
 
+# Naive epoch used to bucket naive UTC datetimes without datetime.timestamp(),
+# which goes through local-time conversion on every call
+_EPOCH = datetime(1970, 1, 1)
+
+# Status rollup for the per-sync_type summary: error beats partial beats success
+_SYNC_LOG_STATUS_RANK = case(
+    (SyncLog.status == 'error', 2),
+    (SyncLog.status == 'partial', 1),
+    else_=0
+)
+_SUMMARY_STATUS_BY_RANK = {0: 'success', 1: 'partial', 2: 'error'}
+
+
+def _time_bucket(dt: datetime, width: int = 10) -> int:
+    """Round a naive datetime down to a `width`-second bucket"""
+    return int((dt - _EPOCH).total_seconds() // width) * width
+
+
+# Serialized detail responses for finished sync runs, keyed by sync_run_id (LRU).
+# Values are (payload, etag, gzipped payload or None).
+SYNC_TERMINAL_STATUSES = ('completed', 'error')
+SYNC_DETAIL_CACHE_SIZE = 128
+_sync_detail_cache = OrderedDict()
+_sync_detail_cache_lock = threading.Lock()
+
+# Short-lived in-process cache for the sync history response. Entries are also
+# dropped whenever the job manager reports a job status change.
+HISTORY_CACHE_TTL = 5  # seconds
+_history_cache = {'payload': None, 'gzipped': None, 'etag': None, 'ts': 0.0, 'version': None}
+_history_cache_lock = threading.Lock()
+
+# JSON bodies at least this large are gzip-compressed for clients that accept it
+JSON_GZIP_MIN_SIZE = 1024
+
+
+def _dumps_json(obj) -> bytes:
+    """
+    Serialize a response payload to JSON bytes.
+    
+    Uses orjson when installed (sorted keys like jsonify; naive datetimes come
+    out in isoformat()), otherwise the app's JSON provider.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return current_app.json.dumps(obj).encode('utf-8')
+
+
+def _gzip_payload(payload: bytes) -> Optional[bytes]:
+    """Gzip a JSON body, or None if it is too small to be worth compressing"""
+    if len(payload) < JSON_GZIP_MIN_SIZE:
+        return None
+    return gzip.compress(payload, compresslevel=6)
+
+
+def _accepts_gzip() -> bool:
+    return request.accept_encodings['gzip'] > 0
+
+
+def _json_response(obj, status: int = 200):
+    """jsonify() equivalent built on _dumps_json (gzipped when large and accepted)"""
+    payload = _dumps_json(obj)
+    gzipped = _gzip_payload(payload) if _accepts_gzip() else None
+    response = current_app.response_class(gzipped or payload, status=status, mimetype='application/json')
+    if gzipped is not None:
+        response.headers['Content-Encoding'] = 'gzip'
+    if len(payload) >= JSON_GZIP_MIN_SIZE:
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+def _json_bytes_response(payload: bytes, etag: str, gzipped: Optional[bytes] = None):
+    """
+    Wrap pre-serialized JSON in a response that honours If-None-Match.
+    
+    Args:
+        payload: JSON body
+        etag: ETag of the body
+        gzipped: Optional pre-compressed body (from _gzip_payload), sent to
+            clients that accept gzip
+    """
+    if gzipped is not None and _accepts_gzip():
+        response = current_app.response_class(gzipped, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+        # Each encoding is a different representation, so it gets its own tag
+        etag = f"{etag}-gzip"
+    else:
+        response = current_app.response_class(payload, mimetype='application/json')
+    if gzipped is not None:
+        response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+def _etag_json_response(obj):
+    """
+    Serialize a polled payload with an ETag of its content.
+    
+    Pollers that send the tag back get a bodiless 304 until something in the
+    payload (status, counters, phase, current item) changes.
+    """
+    payload = _dumps_json(obj)
+    return _json_bytes_response(payload, hashlib.md5(payload).hexdigest(), _gzip_payload(payload))
+
 
 def get_sync_status(sync_run_id: int) -> str:
     """
@@ -107,13 +221,17 @@ def run_sync_async(job_id: str, sync_mode: str):
         logger.debug(f"Created WebProgressTracker for job {job_id}")
         
         # Run sync with the pre-generated sync_run_id
-        if sync_mode == 'full':
-            logger.info(f"Starting full_sync for job {job_id}, sync_run_id={sync_run_id}")
-            results = full_sync(progress_tracker=progress, sync_run_id=sync_run_id)
-        else:
-            logger.info(f"Starting incremental_sync for job {job_id}, sync_run_id={sync_run_id} (force=True for manual trigger)")
-            # Force=True when manually triggered from UI to ensure sync actually runs
-            results = incremental_sync(progress_tracker=progress, sync_run_id=sync_run_id, force=True)
+        try:
+            if sync_mode == 'full':
+                logger.info(f"Starting full_sync for job {job_id}, sync_run_id={sync_run_id}")
+                results = full_sync(progress_tracker=progress, sync_run_id=sync_run_id)
+            else:
+                logger.info(f"Starting incremental_sync for job {job_id}, sync_run_id={sync_run_id} (force=True for manual trigger)")
+                # Force=True when manually triggered from UI to ensure sync actually runs
+                results = incremental_sync(progress_tracker=progress, sync_run_id=sync_run_id, force=True)
+        finally:
+            # Write any buffered progress and stop background flushing for this job
+            progress.close()
         
         logger.info(f"Sync completed for job {job_id}, sync_run_id={sync_run_id}, results: {results}")
         
@@ -215,14 +333,25 @@ def reconcile_stale_jobs(max_age_hours: int = 1):
             SyncJob.updated_at < cutoff_time
         ).all()
         
+        # Fetch sync_logs for all stale jobs in one query and group by sync_run_id
+        run_ids = [job.sync_run_id for job in stale_jobs if job.sync_run_id is not None]
+        logs_by_run = defaultdict(list)
+        if run_ids:
+            for log in session.query(SyncLog).filter(SyncLog.sync_run_id.in_(run_ids)).all():
+                logs_by_run[log.sync_run_id].append(log)
+        
+        # Bucket status changes so each target status is written with one bulk UPDATE
+        # Keyed by (status, error_message)
+        status_updates = defaultdict(list)
+        touched_running = False
+        
         for job in stale_jobs:
-            # Query sync_logs for this sync_run_id
-            logs = session.query(SyncLog).filter_by(sync_run_id=job.sync_run_id).all()
+            logs = logs_by_run.get(job.sync_run_id, [])
             
             if not logs:
                 # No logs - sync never started, mark as error
                 logger.warning(f"Reconciling stale job {job.job_id}: No logs found, marking as error")
-                job_manager.update_job_status(job.job_id, 'error', error_message="Sync never started - no logs found")
+                status_updates[('error', "Sync never started - no logs found")].append(job.job_id)
                 continue
             
             # Check if all logs are complete
@@ -252,12 +381,18 @@ def reconcile_stale_jobs(max_age_hours: int = 1):
                 logger.warning(f"Reconciling stale job {job.job_id}: Logs incomplete, keeping as running")
                 # Update updated_at to prevent it from being checked again immediately
                 job.updated_at = datetime.utcnow()
-                session.commit()
+                touched_running = True
                 continue
             
-            # Update job status
             logger.info(f"Reconciling stale job {job.job_id}: Updating status from 'running' to '{final_status}'")
-            job_manager.update_job_status(job.job_id, final_status)
+            status_updates[(final_status, None)].append(job.job_id)
+        
+        if touched_running:
+            session.commit()
+        
+        # Apply status changes - one UPDATE per bucket instead of one per job
+        for (final_status, error_message), job_ids in status_updates.items():
+            job_manager.bulk_update_job_status(job_ids, final_status, error_message=error_message)
             
     except Exception as e:
         logger.error(f"Error reconciling stale jobs: {e}", exc_info=True)
@@ -277,6 +412,30 @@ def sync_history_page():
 @approved_required
 def api_sync_history():
     """Get sync history - list of all sync runs"""
+    job_manager = get_job_manager()
+    state_version = job_manager.state_version
+    now = time.monotonic()
+    
+    # Serve the cached payload while it is fresh and no job status changed since it was built
+    with _history_cache_lock:
+        if (_history_cache['payload'] is not None
+                and now - _history_cache['ts'] < HISTORY_CACHE_TTL
+                and _history_cache['version'] == state_version):
+            return _json_bytes_response(_history_cache['payload'], _history_cache['etag'],
+                                        _history_cache['gzipped'])
+    
+    payload = _dumps_json(_build_sync_history())
+    etag = hashlib.md5(payload).hexdigest()
+    gzipped = _gzip_payload(payload)
+    
+    with _history_cache_lock:
+        _history_cache.update(payload=payload, gzipped=gzipped, etag=etag, ts=now, version=state_version)
+    
+    return _json_bytes_response(payload, etag, gzipped)
+
+
+def _build_sync_history() -> list:
+    """Build the sync history list (uncached)"""
     db_path = get_database_path()
     job_manager = get_job_manager()
     
@@ -459,11 +618,12 @@ def api_sync_history():
         # Add active jobs that don't have sync_run_id yet AND don't have any database logs
         # (jobs that just started before any sync logs were written)
         # Optimize: Create a lookup map of log start times to sync_run_ids for O(1) lookup
+        # Only built when there are jobs to match - skips a per-log pass on most requests
         log_start_times = {}
-        for log in all_logs:
+        for log in (all_logs if jobs_without_sync_run_id else ()):
             if log.started_at and log.sync_run_id:
                 # Round to nearest 10 seconds for matching (within 10 second window)
-                rounded_time = int(log.started_at.timestamp() / 10) * 10
+                rounded_time = _time_bucket(log.started_at)
                 if rounded_time not in log_start_times:
                     log_start_times[rounded_time] = []
                 log_start_times[rounded_time].append((log.sync_run_id, log.started_at))
@@ -471,34 +631,27 @@ def api_sync_history():
         for job_id, job in jobs_without_sync_run_id.items():
             # Only add if this job hasn't been added via database logs
             # We check by comparing started_at times - if a log exists with similar start time, skip
+            # started_at comes straight from the DateTime column, so it is already a datetime
             job_start = job.get('started_at')
             if job_start:
-                # Convert job_start to datetime if it's a string
-                if isinstance(job_start, str):
-                    try:
-                        job_start = datetime.fromisoformat(job_start.replace('Z', '+00:00'))
-                    except:
-                        pass
-                
                 # Check if there's a log with similar start time (within 10 seconds)
                 has_matching_log = False
-                if isinstance(job_start, datetime):
-                    # Use optimized lookup instead of scanning all_logs
-                    rounded_time = int(job_start.timestamp() / 10) * 10
-                    # Check rounded time and adjacent buckets (±10 seconds)
-                    for check_time in [rounded_time - 10, rounded_time, rounded_time + 10]:
-                        if check_time in log_start_times:
-                            for sync_run_id, log_start in log_start_times[check_time]:
-                                time_diff = abs((log_start - job_start).total_seconds())
-                                if time_diff < 10:
-                                    has_matching_log = True
-                                    # Also mark this sync_run as running if it's not already
-                                    if sync_run_id in sync_runs:
-                                        sync_runs[sync_run_id]['status'] = 'running'
-                                        sync_runs[sync_run_id]['job_id'] = job_id
-                                    break
-                            if has_matching_log:
+                # Use optimized lookup instead of scanning all_logs
+                rounded_time = _time_bucket(job_start)
+                # Check rounded time and adjacent buckets (±10 seconds)
+                for check_time in [rounded_time - 10, rounded_time, rounded_time + 10]:
+                    if check_time in log_start_times:
+                        for sync_run_id, log_start in log_start_times[check_time]:
+                            time_diff = abs((log_start - job_start).total_seconds())
+                            if time_diff < 10:
+                                has_matching_log = True
+                                # Also mark this sync_run as running if it's not already
+                                if sync_run_id in sync_runs:
+                                    sync_runs[sync_run_id]['status'] = 'running'
+                                    sync_runs[sync_run_id]['job_id'] = job_id
                                 break
+                        if has_matching_log:
+                            break
                 
                 if not has_matching_log:
                     # This is a job that just started, hasn't generated sync_run_id yet
@@ -506,7 +659,7 @@ def api_sync_history():
                         'sync_run_id': None,  # Will be set later
                         'job_id': job_id,
                         'sync_mode': job['sync_mode'],
-                        'started_at': job_start.isoformat() if isinstance(job_start, datetime) else str(job_start),
+                        'started_at': job_start.isoformat(),
                         'completed_at': None,
                         'status': 'running',
                         'sync_types': []
@@ -527,7 +680,7 @@ def api_sync_history():
         result = list(sync_runs.values())
         result.sort(key=lambda x: x['started_at'] or '', reverse=True)
         
-        return jsonify(result)
+        return result
         
     finally:
         session.close()
@@ -621,18 +774,12 @@ def api_running_status():
         # Add jobs without sync_run_id yet (just started, no logs yet)
         for job_id, job in jobs_without_sync_run_id.items():
             job_start = job.get('started_at')
-            if isinstance(job_start, str):
-                try:
-                    job_start = datetime.fromisoformat(job_start.replace('Z', '+00:00'))
-                except (ValueError, AttributeError):
-                    # Keep as string if parsing fails
-                    pass
             
             running_syncs.append({
                 'sync_run_id': None,
                 'job_id': job_id,
                 'sync_mode': job.get('sync_mode', 'full'),
-                'started_at': job_start.isoformat() if isinstance(job_start, datetime) else str(job_start),
+                'started_at': job_start.isoformat() if job_start else None,
                 'completed_at': None,
                 'status': 'running',
                 'sync_types': []
@@ -641,7 +788,7 @@ def api_running_status():
         # Sort by started_at (newest first)
         running_syncs.sort(key=lambda x: x['started_at'] or '', reverse=True)
         
-        return jsonify(running_syncs)
+        return _json_response(running_syncs)
         
     finally:
         session.close()
@@ -711,10 +858,125 @@ def api_sync_detail_by_job(job_id):
     })
 
 
+_LISTING_STAT_KEYS = ('messages', 'reviews', 'reservations', 'guests')
+
+# Per-listing stats are stored as a JSON object in sync_logs.listing_stats:
+# {listing_id: {messages: count, reviews: count, reservations: count, guests: count}}
+# Expand it with the dialect's JSON table function and sum per listing in SQL.
+_LISTING_STATS_SQL = {
+    'postgresql': """
+        SELECT je.key AS listing_id,
+               SUM(COALESCE((je.value->>'messages')::int, 0)) AS messages,
+               SUM(COALESCE((je.value->>'reviews')::int, 0)) AS reviews,
+               SUM(COALESCE((je.value->>'reservations')::int, 0)) AS reservations,
+               SUM(COALESCE((je.value->>'guests')::int, 0)) AS guests
+        FROM {table} sl, jsonb_each(sl.listing_stats::jsonb) je
+        WHERE sl.sync_run_id = :sync_run_id AND sl.listing_stats IS NOT NULL AND sl.listing_stats <> ''
+        GROUP BY je.key
+    """,
+    'sqlite': """
+        SELECT je.key AS listing_id,
+               SUM(COALESCE(json_extract(je.value, '$.messages'), 0)) AS messages,
+               SUM(COALESCE(json_extract(je.value, '$.reviews'), 0)) AS reviews,
+               SUM(COALESCE(json_extract(je.value, '$.reservations'), 0)) AS reservations,
+               SUM(COALESCE(json_extract(je.value, '$.guests'), 0)) AS guests
+        FROM {table} sl, json_each(sl.listing_stats) je
+        WHERE sl.sync_run_id = :sync_run_id AND sl.listing_stats IS NOT NULL AND sl.listing_stats <> ''
+        GROUP BY je.key
+    """,
+}
+
+
+def _count_errors(errors_json) -> int:
+    """Count entries in a sync log's errors JSON list (same parsing as SyncLog.get_errors_list)"""
+    if not errors_json:
+        return 0
+    try:
+        return len(json.loads(errors_json))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _aggregate_listing_stats(session, sync_run_id: int) -> dict:
+    """
+    Sum per-listing stats across all sync logs of a sync run.
+    
+    The aggregation runs in the database; if the dialect has no JSON support
+    or a log holds malformed JSON, falls back to decoding each log in Python.
+    
+    Returns:
+        {listing_id: {'messages': X, 'reviews': Y, 'reservations': Z, 'guests': W}}
+    """
+    sql = _LISTING_STATS_SQL.get(session.get_bind().dialect.name)
+    if sql:
+        try:
+            rows = session.execute(
+                text(sql.format(table=SyncLog.__table__.fullname)),
+                {'sync_run_id': sync_run_id}
+            ).all()
+            return {
+                int(row.listing_id): {key: int(getattr(row, key) or 0) for key in _LISTING_STAT_KEYS}
+                for row in rows
+            }
+        except Exception as e:
+            logger.warning(f"SQL listing_stats aggregation failed for sync_run_id={sync_run_id}, falling back: {e}")
+            session.rollback()
+    
+    aggregated_stats = {}
+    rows = session.query(SyncLog.listing_stats).filter(
+        SyncLog.sync_run_id == sync_run_id,
+        SyncLog.listing_stats.isnot(None)
+    ).all()
+    for (raw_stats,) in rows:
+        try:
+            stats = json.loads(raw_stats) if raw_stats else {}
+        except (TypeError, ValueError):
+            continue
+        for listing_id, listing_data in stats.items():
+            totals = aggregated_stats.setdefault(int(listing_id), dict.fromkeys(_LISTING_STAT_KEYS, 0))
+            for key in _LISTING_STAT_KEYS:
+                if key in listing_data:
+                    totals[key] += listing_data[key]
+    return aggregated_stats
+
+
 @sync_bp.route('/api/<int:sync_run_id>/detail')
 @approved_required
 def api_sync_detail(sync_run_id):
     """Get sync detail with per-listing breakdown"""
+    # Finished sync runs never change, so their detail is served from memory
+    with _sync_detail_cache_lock:
+        cached = _sync_detail_cache.get(sync_run_id)
+        if cached is not None:
+            _sync_detail_cache.move_to_end(sync_run_id)
+    if cached is not None:
+        return _json_bytes_response(*cached)
+    
+    result, http_status = _compute_sync_detail(sync_run_id)
+    
+    if http_status == 200 and result.get('status') in SYNC_TERMINAL_STATUSES and not result.get('is_running'):
+        # Cache the serialized (and compressed) body so hits skip jsonify and gzip as well as the queries
+        payload = _dumps_json(result)
+        etag = hashlib.md5(payload).hexdigest()
+        gzipped = _gzip_payload(payload)
+        with _sync_detail_cache_lock:
+            _sync_detail_cache[sync_run_id] = (payload, etag, gzipped)
+            while len(_sync_detail_cache) > SYNC_DETAIL_CACHE_SIZE:
+                _sync_detail_cache.popitem(last=False)
+        return _json_bytes_response(payload, etag, gzipped)
+    
+    if http_status == 200:
+        return _etag_json_response(result)
+    return _json_response(result, http_status)
+
+
+def _compute_sync_detail(sync_run_id: int):
+    """
+    Build the sync detail payload for a sync run (uncached).
+    
+    Returns:
+        Tuple of (payload dict, HTTP status code)
+    """
     db_path = get_database_path()
     job_manager = get_job_manager()
     
@@ -724,9 +986,21 @@ def api_sync_detail(sync_run_id):
     
     try:
         # Get all sync logs for this sync_run_id - this is the source of truth
-        logs = session.query(SyncLog).filter(
-            SyncLog.sync_run_id == sync_run_id
-        ).order_by(SyncLog.started_at).all()
+        # Only the columns used below, as plain rows (listing_stats is aggregated in SQL)
+        logs = session.execute(
+            select(
+                SyncLog.sync_type,
+                SyncLog.sync_mode,
+                SyncLog.records_processed,
+                SyncLog.records_created,
+                SyncLog.records_updated,
+                SyncLog.errors,
+                SyncLog.started_at,
+                SyncLog.completed_at
+            ).where(
+                SyncLog.sync_run_id == sync_run_id
+            ).order_by(SyncLog.started_at)
+        ).all()
         
         # If no logs found in database, check job manager (for cases where sync_run_id wasn't saved)
         if not logs:
@@ -749,7 +1023,7 @@ def api_sync_detail(sync_run_id):
                                 'processed': result_data.get('records_processed', 0) or 0
                             }
                 
-                return jsonify({
+                return {
                     'sync_run_id': sync_run_id,
                     'sync_mode': job_by_sync_run_id.get('sync_mode', 'unknown'),
                     'started_at': job_by_sync_run_id.get('started_at').isoformat() if job_by_sync_run_id.get('started_at') else None,
@@ -758,30 +1032,14 @@ def api_sync_detail(sync_run_id):
                     'is_running': job_status in ('pending', 'running'),
                     'listings': [],
                     'summary': summary_by_type
-                })
+                }, 200
             
-            return jsonify({'error': 'Sync run not found'}), 404
+            return {'error': 'Sync run not found'}, 404
         
-        # Use the same status determination logic as the history API
-        # Get active jobs from job manager (get fresh copy to catch any updates)
-        active_jobs = job_manager.get_all_active_jobs()
-        active_sync_run_ids = {job.get('sync_run_id') for job in active_jobs.values() if job.get('sync_run_id')}
-        
-        # IMPORTANT: Also directly get the job by sync_run_id using the dedicated method
-        # This ensures we find the job even if it wasn't in active_jobs for some reason
+        # Look up the job for this sync_run_id directly - no need to scan every active job
         # Now that sync_run_id is set immediately when sync starts, this should always work
         job_by_sync_run_id = job_manager.get_job_by_sync_run_id(sync_run_id)
         
-        # Create a map of job_id to job for easy lookup
-        jobs_by_sync_run_id = {job.get('sync_run_id'): job for job in active_jobs.values() if job.get('sync_run_id')}
-        sync_run_id_to_jobs = {}
-        for job_id, job in active_jobs.items():
-            sync_run_id_val = job.get('sync_run_id')
-            if sync_run_id_val:
-                if sync_run_id_val not in sync_run_id_to_jobs:
-                    sync_run_id_to_jobs[sync_run_id_val] = []
-                sync_run_id_to_jobs[sync_run_id_val].append(job_id)
-        
         # Use simple database query for status (single source of truth)
         status = get_sync_status(sync_run_id)
         
@@ -789,50 +1047,23 @@ def api_sync_detail(sync_run_id):
         is_running = (status == 'running')
         
         # Get active job for progress tracking
-        if is_running:
-            # First check if job exists and is running (using direct lookup - most reliable)
-            if job_by_sync_run_id and job_by_sync_run_id.get('status') in ('pending', 'running'):
-                active_job = job_by_sync_run_id
-            elif sync_run_id in active_sync_run_ids:
-                # Also check active_sync_run_ids as fallback
-                active_job = jobs_by_sync_run_id.get(sync_run_id)
-            else:
-                active_job = None
+        if is_running and job_by_sync_run_id and job_by_sync_run_id.get('status') in ('pending', 'running'):
+            active_job = job_by_sync_run_id
         else:
             active_job = None
         
-        # Aggregate listing_stats from all sync types
-        aggregated_stats = {}  # {listing_id: {messages: X, reviews: Y, reservations: Z, guests: W}}
-        
-        for log in logs:
-            stats = log.get_listing_stats()
-            for listing_id, listing_data in stats.items():
-                listing_id_int = int(listing_id) if isinstance(listing_id, str) else listing_id
-                if listing_id_int not in aggregated_stats:
-                    aggregated_stats[listing_id_int] = {
-                        'messages': 0,
-                        'reviews': 0,
-                        'reservations': 0,
-                        'guests': 0
-                    }
-                
-                # Merge stats
-                if 'messages' in listing_data:
-                    aggregated_stats[listing_id_int]['messages'] += listing_data['messages']
-                if 'reviews' in listing_data:
-                    aggregated_stats[listing_id_int]['reviews'] += listing_data['reviews']
-                if 'reservations' in listing_data:
-                    aggregated_stats[listing_id_int]['reservations'] += listing_data['reservations']
-                if 'guests' in listing_data:
-                    aggregated_stats[listing_id_int]['guests'] += listing_data['guests']
-        
-        # Get listing details
-        listing_ids = list(aggregated_stats.keys())
-        listings = session.query(Listing).filter(
-            Listing.listing_id.in_(listing_ids)
-        ).all()
+        # Aggregate listing_stats from all sync types (summed in the database)
+        aggregated_stats = _aggregate_listing_stats(session, sync_run_id)
         
-        listing_map = {l.listing_id: l for l in listings}
+        # Get listing details - only the columns we render, as plain rows (no ORM hydration)
+        listing_map = {}
+        if aggregated_stats:
+            listing_rows = session.query(
+                Listing.listing_id, Listing.name, Listing.address
+            ).filter(
+                Listing.listing_id.in_(list(aggregated_stats.keys()))
+            ).all()
+            listing_map = {row.listing_id: row for row in listing_rows}
         
         # Build result
         listings_data = []
@@ -849,37 +1080,49 @@ def api_sync_detail(sync_run_id):
             })
         
         # Aggregate summary by sync_type (listings, reservations, messages, reviews, guests)
+        # Sums and the status rollup run in SQL - one row per sync_type instead of one per log
+        summary_rows = session.query(
+            SyncLog.sync_type,
+            func.sum(SyncLog.records_created).label('created'),
+            func.sum(SyncLog.records_updated).label('updated'),
+            func.sum(SyncLog.records_processed).label('processed'),
+            func.max(_SYNC_LOG_STATUS_RANK).label('status_rank')
+        ).filter(
+            SyncLog.sync_run_id == sync_run_id
+        ).group_by(SyncLog.sync_type).all()
+        
         summary_by_type = {}  # {sync_type: {created, updated, errors, processed, status}}
+        for row in summary_rows:
+            summary_by_type[row.sync_type] = {
+                'created': row.created or 0,
+                'updated': row.updated or 0,
+                'errors': 0,
+                'processed': row.processed or 0,
+                'status': _SUMMARY_STATUS_BY_RANK[row.status_rank or 0]
+            }
+        
+        # Get sync run metadata - logs are ordered by started_at, so the first log started first
+        first_log = logs[0]
+        # Single pass over the logs for:
+        # - error counts (stored as a JSON list - only decode logs that actually have some)
+        # - the latest log (by completed_at if available, otherwise by started_at)
+        # - the most recently started incomplete log (for progress when no job is found)
+        last_log = None
+        last_log_key = None
+        latest_incomplete = None
         for log in logs:
-            sync_type = log.sync_type
-            if sync_type not in summary_by_type:
-                summary_by_type[sync_type] = {
-                    'created': 0,
-                    'updated': 0,
-                    'errors': 0,
-                    'processed': 0,
-                    'status': 'success'  # Default to success, will be updated if error found
-                }
-            
-            summary_by_type[sync_type]['created'] += log.records_created or 0
-            summary_by_type[sync_type]['updated'] += log.records_updated or 0
-            summary_by_type[sync_type]['processed'] += log.records_processed or 0
+            if log.errors:
+                summary_by_type[log.sync_type]['errors'] += _count_errors(log.errors)
             
-            # Count errors
-            error_list = log.get_errors_list()
-            summary_by_type[sync_type]['errors'] += len(error_list) if error_list else 0
+            log_key = log.completed_at or log.started_at or datetime.min
+            if last_log is None or log_key > last_log_key:
+                last_log, last_log_key = log, log_key
             
-            # Update status if this log has an error status
-            if log.status == 'error':
-                summary_by_type[sync_type]['status'] = 'error'
-            elif log.status == 'partial' and summary_by_type[sync_type]['status'] != 'error':
-                # Partial means some errors but not fatal - only set if not already error
-                summary_by_type[sync_type]['status'] = 'partial'
-        
-        # Get sync run metadata
-        first_log = logs[0]
-        # Find the latest log (by completed_at if available, otherwise by started_at)
-        last_log = max(logs, key=lambda x: x.completed_at if x.completed_at else (x.started_at if x.started_at else datetime.min))
+            if log.completed_at is None and (
+                latest_incomplete is None
+                or (log.started_at or datetime.min) > (latest_incomplete.started_at or datetime.min)
+            ):
+                latest_incomplete = log
         
         result = {
             'sync_run_id': sync_run_id,
@@ -911,21 +1154,19 @@ def api_sync_detail(sync_run_id):
             else:
                 # Job not found but sync is running (has incomplete logs)
                 # Create a basic progress object from logs
-                incomplete_logs = [log for log in logs if log.completed_at is None]
-                if incomplete_logs:
-                    latest_incomplete = max(incomplete_logs, key=lambda x: x.started_at if x.started_at else datetime.min)
+                if latest_incomplete:
                     result['progress'] = {
                         'phase': f'Syncing {latest_incomplete.sync_type}...',
                         'processed': latest_incomplete.records_processed or 0,
                         'total': latest_incomplete.records_processed or 0,  # We don't know total yet
                         'created': latest_incomplete.records_created or 0,
                         'updated': latest_incomplete.records_updated or 0,
-                        'errors': len(latest_incomplete.get_errors_list()) if latest_incomplete.errors else 0,
+                        'errors': _count_errors(latest_incomplete.errors),
                         'percentage': 0.0,
                         'current_item': None
                     }
         
-        return jsonify(result)
+        return result, 200
         
     finally:
         session.close()
@@ -970,13 +1211,17 @@ def api_trigger_incremental_sync():
 @approved_required
 def api_sync_status(job_id):
     """Get sync progress status"""
-    job_manager = get_job_manager()
-    job = job_manager.get_job(job_id)
-    
-    if not job:
-        return jsonify({'error': 'Job not found'}), 404
-    
-    progress = job.get('progress', {})
+    # A sync running in this process is answered from its in-memory tracker, without
+    # touching the database (the stored copy lags by up to one flush anyway). The
+    # tracker only exists between the job being marked running and the sync finishing.
+    progress = get_live_progress(job_id)
+    if progress is not None:
+        job = {'status': 'running', 'results': None, 'error': None}
+    else:
+        job = get_job_manager().get_job(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        progress = job.get('progress', {})
     
     # Ensure progress has all required fields
     progress_data = {
@@ -990,7 +1235,7 @@ def api_sync_status(job_id):
         'current_item': progress.get('current_item') or progress.get('item_name')
     }
     
-    return jsonify({
+    return _etag_json_response({
         'status': job['status'],
         'progress': progress_data,
         'results': job.get('results'),
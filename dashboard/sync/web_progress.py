@@ -4,9 +4,79 @@ Web-based progress tracker for sync operations.
 """
 
 import time
-from typing import Optional
+import logging
+import threading
+from typing import Dict, Optional
 from dashboard.sync.job_manager import get_job_manager
 
+logger = logging.getLogger(__name__)
+
+
+class ProgressFlusher:
+    """
+    Background writer for WebProgressTracker state.
+    
+    Trackers only mark themselves dirty while a sync runs; a daemon thread
+    writes dirty trackers to the database every `interval` seconds, keeping
+    the sync loop free of per-item SQL.
+    """
+    
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._trackers: Dict[str, 'WebProgressTracker'] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def register(self, tracker: 'WebProgressTracker'):
+        """Start flushing a tracker (starts the flusher thread on first use)"""
+        with self._lock:
+            self._trackers[tracker.job_id] = tracker
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='progress-flusher', daemon=True)
+                self._thread.start()
+    
+    def unregister(self, tracker: 'WebProgressTracker'):
+        """Stop flushing a tracker"""
+        with self._lock:
+            if self._trackers.get(tracker.job_id) is tracker:
+                del self._trackers[tracker.job_id]
+    
+    def get_tracker(self, job_id: str) -> Optional['WebProgressTracker']:
+        """Get the live tracker for a job running in this process, if any"""
+        with self._lock:
+            return self._trackers.get(job_id)
+    
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                trackers = list(self._trackers.values())
+            for tracker in trackers:
+                try:
+                    tracker._flush_if_dirty()
+                except Exception as e:
+                    logger.warning(f"Error flushing progress for job {tracker.job_id}: {e}")
+
+
+# Global flusher instance
+_progress_flusher = ProgressFlusher()
+
+
+def get_live_progress(job_id: str) -> Optional[dict]:
+    """
+    Get in-memory progress for a job whose sync runs in this process.
+    
+    Returns:
+        Progress dict (same shape as the stored progress), or None if the job
+        is not being tracked here
+    """
+    tracker = _progress_flusher.get_tracker(job_id)
+    if tracker is None:
+        return None
+    progress = tracker.get_progress()
+    progress['current_item'] = tracker.current_item
+    return progress
+
 
 class WebProgressTracker:
     """Progress tracker that stores state for web polling"""
@@ -28,6 +98,12 @@ class WebProgressTracker:
         self.updated_count = 0
         self.error_count = 0
         self.start_time = None
+        self.percentage = 0.0
+        self._dirty = False
+        # Serializes flush() between the sync thread and the flusher thread, so
+        # an older snapshot can never be written after a newer one
+        self._flush_lock = threading.Lock()
+        _progress_flusher.register(self)
     
     def start_phase(self, phase_name: str, total_items: int = 0):
         """Start a new sync phase"""
@@ -38,11 +114,13 @@ class WebProgressTracker:
         self.updated_count = 0
         self.error_count = 0
         self.start_time = time.time()
-        self._update_progress()
+        self._update_percentage()
+        self.flush()
     
     def update_total(self, new_total: int):
         """Update the total items count dynamically"""
         self.total_items = new_total
+        self._update_percentage()
         self._update_progress()
     
     def update_item(self, item_name: str, status: str = "processing"):
@@ -50,7 +128,7 @@ class WebProgressTracker:
         self.current_item = item_name
         self._update_progress()
     
-    def increment(self, created: bool = False, updated: bool = False, error: bool = False, 
+    def increment(self, created: bool = False, updated: bool = False, error: bool = False,
                   item_name: Optional[str] = None, allow_exceed_total: bool = False):
         """
         Increment progress counters.
@@ -64,6 +142,7 @@ class WebProgressTracker:
         """
         if allow_exceed_total or self.total_items == 0 or self.processed_items < self.total_items:
             self.processed_items += 1
+            self._update_percentage()
         
         if created:
             self.created_count += 1
@@ -76,27 +155,49 @@ class WebProgressTracker:
         
         self._update_progress()
     
+    def _update_percentage(self):
+        """Recompute the cached percentage (only processed/total changes affect it)"""
+        self.percentage = self.processed_items * 100.0 / self.total_items if self.total_items > 0 else 0.0
+    
     def _update_progress(self):
-        """Update progress in job manager (which writes to database)"""
-        self.job_manager.update_progress(
-            self.job_id,
-            phase=self.current_phase,
-            processed=self.processed_items,
-            total=self.total_items,
-            created=self.created_count,
-            updated=self.updated_count,
-            errors=self.error_count,
-            current_item=self.current_item
-        )
+        """Mark progress as changed - the flusher thread writes it to the database"""
+        self._dirty = True
+    
+    def _flush_if_dirty(self):
+        """Write progress if it changed since the last write (called by the flusher)"""
+        if self._dirty:
+            self.flush()
+    
+    def flush(self):
+        """Write current progress to the job manager (which writes to database)"""
+        with self._flush_lock:
+            # Clear first so changes made during the write are picked up next round
+            self._dirty = False
+            self.job_manager.update_progress(
+                self.job_id,
+                phase=self.current_phase,
+                processed=self.processed_items,
+                total=self.total_items,
+                created=self.created_count,
+                updated=self.updated_count,
+                errors=self.error_count,
+                percentage=self.percentage,
+                current_item=self.current_item
+            )
     
     def complete_phase(self):
         """Complete the current phase"""
-        self._update_progress()
+        self.flush()
         # Reset item name and phase for next phase
         self.current_item = None
         # Note: current_phase is intentionally NOT reset here
         # The next phase will call start_phase() which will set it
     
+    def close(self):
+        """Write any pending progress and stop background flushing"""
+        _progress_flusher.unregister(self)
+        self._flush_if_dirty()
+    
     def get_progress(self) -> dict:
         """Get current progress state"""
         return {
@@ -106,6 +207,5 @@ class WebProgressTracker:
             'created': self.created_count,
             'updated': self.updated_count,
             'errors': self.error_count,
-            'percentage': (self.processed_items / self.total_items * 100) if self.total_items > 0 else 0.0
+            'percentage': self.percentage
         }
-
@@ -6,8 +6,12 @@ AI-powered ticket suggestions from issues.
 import sys
 import os
 import json
-import re
-from typing import Dict, Optional
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 
 # Add parent directories to path
@@ -15,44 +19,159 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 sys.path.insert(0, project_root)
 
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
 except ImportError:
     raise ImportError("openai library not installed. Run: pip3 install openai>=1.12.0")
 
 import dashboard.config as config
 from database.models import get_session as get_main_session, Listing
 
+# Global OpenAI client (singleton pattern) - keeps the HTTP connection pool warm across calls
+_openai_client = None
 
-def generate_ticket_suggestions(listing_id: int, issue_title: str, issue_details: str = '') -> Dict:
+
+def _has_api_key() -> bool:
+    """Whether an OpenAI key is configured (blank keys can only fail in the SDK)"""
+    return bool((config.OPENAI_API_KEY or '').strip())
+
+
+def _get_client():
+    """Get or create the shared OpenAI client."""
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = OpenAI(api_key=config.OPENAI_API_KEY)
+    return _openai_client
+
+
+# Parsed suggestions keyed by (listing_id, sha256 of the issue text, model), so
+# re-submitting the same issue (retries, preview refreshes) skips the OpenAI call.
+# Values are stored without the due date, which is relative to the request time.
+SUGGESTION_CACHE_TTL = 24 * 60 * 60  # seconds
+SUGGESTION_CACHE_SIZE = 512
+_suggestion_cache = OrderedDict()  # cache_key -> (expires_at, result_dict)
+_suggestion_cache_lock = threading.Lock()
+
+# Values accepted from the model; anything else falls back to Medium / other
+_VALID_PRIORITIES = frozenset(('Low', 'Medium', 'High', 'Critical'))
+_VALID_CATEGORIES = frozenset(('cleaning', 'maintenance', 'online', 'technology', 'review management', 'other'))
+
+# Maximum number of concurrent OpenAI requests in generate_ticket_suggestions_batch
+SUGGESTION_BATCH_CONCURRENCY = 8
+
+# Maximum number of items per batch request (each uncached item is a paid completion)
+SUGGESTION_BATCH_MAX_ITEMS = 25
+
+# Listing (name, address) pairs for prompts, keyed by listing_id. Short TTL so
+# names and addresses updated by a listing sync show up without a restart.
+LISTING_LABEL_CACHE_TTL = 10 * 60  # seconds
+LISTING_LABEL_CACHE_SIZE = 2048
+_listing_label_cache = OrderedDict()  # listing_id -> (expires_at, (name, address))
+_listing_label_cache_lock = threading.Lock()
+
+
+def _suggestion_cache_key(listing_id: int, issue_title: str, issue_details: str) -> tuple:
+    digest = hashlib.sha256(f"{issue_title}\n{issue_details or ''}".encode('utf-8')).hexdigest()
+    return (listing_id, digest, config.OPENAI_MODEL)
+
+
+def _get_cached_suggestion(cache_key: tuple) -> Optional[Dict]:
+    """Return a copy of a cached suggestion, or None if missing/expired"""
+    with _suggestion_cache_lock:
+        entry = _suggestion_cache.get(cache_key)
+        if entry is None:
+            return None
+        expires_at, result_dict = entry
+        if expires_at < time.monotonic():
+            del _suggestion_cache[cache_key]
+            return None
+        _suggestion_cache.move_to_end(cache_key)
+        return dict(result_dict)
+
+
+def _cache_suggestion(cache_key: tuple, result_dict: Dict):
+    with _suggestion_cache_lock:
+        _suggestion_cache[cache_key] = (time.monotonic() + SUGGESTION_CACHE_TTL, dict(result_dict))
+        _suggestion_cache.move_to_end(cache_key)
+        while len(_suggestion_cache) > SUGGESTION_CACHE_SIZE:
+            _suggestion_cache.popitem(last=False)
+
+
+def _apply_due_date(result_dict: Dict) -> Dict:
+    """Calculate actual due date if suggested_due_date_days is provided"""
+    if result_dict['suggested_due_date_days'] is not None:
+        try:
+            days = int(result_dict['suggested_due_date_days'])
+            if days > 0:
+                due_date = (datetime.now() + timedelta(days=days)).date()
+                result_dict['suggested_due_date'] = due_date.isoformat()
+        except (ValueError, TypeError):
+            pass
+    return result_dict
+
+
+def _format_listing_label(listing_id: int, name: Optional[str], address: Optional[str],
+                          city: Optional[str]) -> Tuple[str, str]:
+    """Build the (name, address) pair used in the suggestion prompt"""
+    listing_name = name or f"Listing {listing_id}"
+    listing_address = f"{address or ''}, {city or ''}".strip(', ')
+    return listing_name, listing_address
+
+
+def _get_listing_label(listing_id: int) -> Tuple[str, str]:
     """
-    Generate AI suggestions for creating a ticket from an issue.
+    Get (name, address) for a listing's prompt context.
     
-    Args:
-        listing_id: The listing ID this ticket is for
-        issue_title: The title of the issue
-        issue_details: Additional details about the issue
-        
-    Returns:
-        Dictionary with suggested title, description, priority, and due_date
+    Cached per process for LISTING_LABEL_CACHE_TTL seconds.
+    
+    Raises:
+        ValueError: If the listing does not exist (not cached)
     """
-    # Get listing information for context
+    now = time.monotonic()
+    with _listing_label_cache_lock:
+        entry = _listing_label_cache.get(listing_id)
+        if entry is not None:
+            expires_at, label = entry
+            if expires_at >= now:
+                _listing_label_cache.move_to_end(listing_id)
+                return label
+            del _listing_label_cache[listing_id]
+    
     session = get_main_session(config.MAIN_DATABASE_PATH)
     try:
-        listing = session.query(Listing).filter(Listing.listing_id == listing_id).first()
-        if not listing:
+        row = session.query(Listing).with_entities(
+            Listing.name, Listing.address, Listing.city
+        ).filter(Listing.listing_id == listing_id).first()
+        if not row:
             raise ValueError(f"Listing {listing_id} not found")
-        
-        listing_name = listing.name or f"Listing {listing_id}"
-        listing_address = f"{listing.address or ''}, {listing.city or ''}".strip(', ')
+        label = _format_listing_label(listing_id, row.name, row.address, row.city)
     finally:
         session.close()
     
-    # Initialize OpenAI client
-    client_kwargs = {'api_key': config.OPENAI_API_KEY}
-    client = OpenAI(**client_kwargs)
+    with _listing_label_cache_lock:
+        _listing_label_cache[listing_id] = (now + LISTING_LABEL_CACHE_TTL, label)
+        _listing_label_cache.move_to_end(listing_id)
+        while len(_listing_label_cache) > LISTING_LABEL_CACHE_SIZE:
+            _listing_label_cache.popitem(last=False)
+    return label
+
+
+def _extract_json_object(text: str) -> str:
+    """
+    Return the outermost {...} span of a model response.
     
-    # Build prompt for ticket suggestions
-    prompt = f"""You are a property management operations expert. Based on the following issue for a property listing, suggest a specific, atomic action item (ticket) that can be created to address this issue.
+    Drops markdown code fences and any prose around the JSON object using
+    plain string scans (no backtracking regex).
+    """
+    start = text.find('{')
+    end = text.rfind('}')
+    if start == -1 or end < start:
+        return text
+    return text[start:end + 1]
+
+
+def _build_prompt(listing_name: str, listing_address: str, issue_title: str, issue_details: str) -> str:
+    """Build the user prompt for a ticket suggestion"""
+    return f"""You are a property management operations expert. Based on the following issue for a property listing, suggest a specific, atomic action item (ticket) that can be created to address this issue.
 
 Listing: {listing_name}
 Address: {listing_address}
@@ -101,98 +220,259 @@ Guidelines:
 - Return ONLY the JSON object, nothing else
 """
 
+
+def _build_messages(prompt: str) -> list:
+    return [
+        {"role": "system", "content": "You are an expert property management operations analyst. Create specific, actionable tickets from issues. Always respond with valid JSON only."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _create_completion(client, messages: list):
+    """Request a completion, retrying without JSON mode for models that don't support it"""
+    try:
+        return client.chat.completions.create(
+            model=config.OPENAI_MODEL,
+            messages=messages,
+            temperature=0.7,
+            response_format={"type": "json_object"}
+        )
+    except Exception as json_mode_error:
+        # Fallback: try without JSON mode if the model doesn't support it
+        return client.chat.completions.create(
+            model=config.OPENAI_MODEL,
+            messages=messages,
+            temperature=0.7
+        )
+
+
+async def _create_completion_async(client, messages: list):
+    """Async counterpart of _create_completion"""
+    try:
+        return await client.chat.completions.create(
+            model=config.OPENAI_MODEL,
+            messages=messages,
+            temperature=0.7,
+            response_format={"type": "json_object"}
+        )
+    except Exception as json_mode_error:
+        return await client.chat.completions.create(
+            model=config.OPENAI_MODEL,
+            messages=messages,
+            temperature=0.7
+        )
+
+
+def _parse_suggestions(content: str, issue_title: str) -> Dict:
+    """
+    Parse and normalize a model response into a suggestion dict.
+    
+    Raises:
+        json.JSONDecodeError: If the response contains no valid JSON
+        ValueError: If the JSON is not an object
+    """
+    result = content.strip()
+    
+    # JSON mode normally returns a bare object - only clean up when that fails
     try:
-        # Try with JSON mode first (for supported models)
-        try:
-            response = client.chat.completions.create(
-                model=config.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": "You are an expert property management operations analyst. Create specific, actionable tickets from issues. Always respond with valid JSON only."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                response_format={"type": "json_object"}
-            )
-        except Exception as json_mode_error:
-            # Fallback: try without JSON mode if the model doesn't support it
-            response = client.chat.completions.create(
-                model=config.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": "You are an expert property management operations analyst. Create specific, actionable tickets from issues. Always respond with valid JSON only."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7
-            )
-        
-        result = response.choices[0].message.content.strip()
-        
-        # Try to extract JSON if it's wrapped in markdown code blocks
-        # Remove markdown code blocks if present
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', result, re.DOTALL)
-        if json_match:
-            result = json_match.group(1)
-        
-        # Try to find JSON object in the response
-        json_match = re.search(r'\{.*\}', result, re.DOTALL)
-        if json_match:
-            result = json_match.group(0)
-        
         suggestions = json.loads(result)
+    except json.JSONDecodeError:
+        suggestions = json.loads(_extract_json_object(result))
+    
+    # Validate and normalize the response
+    if not isinstance(suggestions, dict):
+        raise ValueError("Invalid response format from AI")
+    
+    # Ensure all required fields exist
+    result_dict = {
+        'title': suggestions.get('title', issue_title),
+        'description': suggestions.get('description', ''),
+        'priority': suggestions.get('priority', 'Medium'),
+        'category': suggestions.get('category', 'other'),
+        'suggested_due_date_days': suggestions.get('suggested_due_date_days')
+    }
+    
+    # Validate priority
+    if result_dict['priority'] not in _VALID_PRIORITIES:
+        result_dict['priority'] = 'Medium'
+    
+    # Validate category
+    if result_dict['category'] not in _VALID_CATEGORIES:
+        result_dict['category'] = 'other'
+    
+    return result_dict
+
+
+def _basic_suggestion(issue_title: str, issue_details: str) -> Dict:
+    """Deterministic suggestion used when the AI call fails"""
+    return {
+        'title': f"Address: {issue_title}",
+        'description': issue_details or f"Action item to address: {issue_title}",
+        'priority': 'Medium',
+        'category': 'other',
+        'suggested_due_date_days': None
+    }
+
+
+def generate_ticket_suggestions(listing_id: int, issue_title: str, issue_details: str = '') -> Dict:
+    """
+    Generate AI suggestions for creating a ticket from an issue.
+    
+    Args:
+        listing_id: The listing ID this ticket is for
+        issue_title: The title of the issue
+        issue_details: Additional details about the issue
+    
+    Returns:
+        Dictionary with suggested title, description, priority, and due_date
+    """
+    if not _has_api_key():
+        return _basic_suggestion(issue_title, issue_details)
+    
+    cache_key = _suggestion_cache_key(listing_id, issue_title, issue_details)
+    cached = _get_cached_suggestion(cache_key)
+    if cached is not None:
+        return _apply_due_date(cached)
+    
+    # Get listing information for context
+    listing_name, listing_address = _get_listing_label(listing_id)
+    
+    client = _get_client()
+    
+    # Build prompt for ticket suggestions
+    prompt = _build_prompt(listing_name, listing_address, issue_title, issue_details)
+    
+    try:
+        response = _create_completion(client, _build_messages(prompt))
+        result_dict = _parse_suggestions(response.choices[0].message.content, issue_title)
         
-        # Validate and normalize the response
-        if not isinstance(suggestions, dict):
-            raise ValueError("Invalid response format from AI")
-        
-        # Ensure all required fields exist
-        result_dict = {
-            'title': suggestions.get('title', issue_title),
-            'description': suggestions.get('description', ''),
-            'priority': suggestions.get('priority', 'Medium'),
-            'category': suggestions.get('category', 'other'),
-            'suggested_due_date_days': suggestions.get('suggested_due_date_days')
-        }
-        
-        # Validate priority
-        valid_priorities = ['Low', 'Medium', 'High', 'Critical']
-        if result_dict['priority'] not in valid_priorities:
-            result_dict['priority'] = 'Medium'
-        
-        # Validate category
-        valid_categories = ['cleaning', 'maintenance', 'online', 'technology', 'review management', 'other']
-        if result_dict['category'] not in valid_categories:
-            result_dict['category'] = 'other'
-        
-        # Calculate actual due date if suggested_due_date_days is provided
-        if result_dict['suggested_due_date_days'] is not None:
-            try:
-                days = int(result_dict['suggested_due_date_days'])
-                if days > 0:
-                    due_date = (datetime.now() + timedelta(days=days)).date()
-                    result_dict['suggested_due_date'] = due_date.isoformat()
-            except (ValueError, TypeError):
-                pass
-        
-        return result_dict
+        # Only successful AI suggestions are cached - fallbacks below are retried next time
+        _cache_suggestion(cache_key, result_dict)
         
+        return _apply_due_date(result_dict)
+    
     except json.JSONDecodeError as e:
         # JSON parsing failed - return basic suggestion
         import traceback
         traceback.print_exc()
-        return {
-            'title': f"Address: {issue_title}",
-            'description': issue_details or f"Action item to address: {issue_title}",
-            'priority': 'Medium',
-            'category': 'other',
-            'suggested_due_date_days': None
-        }
+        return _basic_suggestion(issue_title, issue_details)
     except Exception as e:
         # Return a basic suggestion if AI fails
         import traceback
         traceback.print_exc()
-        return {
-            'title': f"Address: {issue_title}",
-            'description': issue_details or f"Action item to address: {issue_title}",
-            'priority': 'Medium',
-            'category': 'other',
-            'suggested_due_date_days': None
-        }
+        return _basic_suggestion(issue_title, issue_details)
+
+
+async def _request_suggestions(prompts: List[str]) -> list:
+    """
+    Run the completions for several prompts concurrently.
+    
+    Returns:
+        One entry per prompt: the response text, or the exception it raised
+    """
+    semaphore = asyncio.Semaphore(SUGGESTION_BATCH_CONCURRENCY)
+    
+    async with AsyncOpenAI(api_key=config.OPENAI_API_KEY) as client:
+        async def request(prompt: str) -> str:
+            async with semaphore:
+                response = await _create_completion_async(client, _build_messages(prompt))
+                return response.choices[0].message.content
+        
+        return await asyncio.gather(*(request(prompt) for prompt in prompts), return_exceptions=True)
+
+
+def validate_suggestion_batch_items(items) -> Optional[str]:
+    """
+    Check a batch request's items before any OpenAI call is made.
+    
+    Args:
+        items: Value of the request's items field
+    
+    Returns:
+        Error message for a 400 response, or None if the items are valid
+    """
+    if not isinstance(items, list) or not items:
+        return 'items is required'
+    if len(items) > SUGGESTION_BATCH_MAX_ITEMS:
+        return f'At most {SUGGESTION_BATCH_MAX_ITEMS} items are allowed per batch'
+    for item in items:
+        if not isinstance(item, dict):
+            return 'Each item must be an object'
+        listing_id = item.get('listing_id')
+        # bool is an int subclass, but never a valid listing id
+        if not isinstance(listing_id, int) or isinstance(listing_id, bool):
+            return 'listing_id is required and must be an integer'
+        issue_title = item.get('issue_title')
+        if not isinstance(issue_title, str) or not issue_title.strip():
+            return 'issue_title is required and must be a string'
+        issue_details = item.get('issue_details')
+        if issue_details is not None and not isinstance(issue_details, str):
+            return 'issue_details must be a string'
+    return None
+
+
+def generate_ticket_suggestions_batch(items: List[Dict]) -> List[Dict]:
+    """
+    Generate AI suggestions for several issues at once.
+    
+    Uncached items are sent to OpenAI concurrently (at most
+    SUGGESTION_BATCH_CONCURRENCY in flight), so a batch takes roughly as long
+    as its slowest request instead of the sum of all of them.
+    
+    Args:
+        items: Dicts with listing_id, issue_title and optional issue_details
+    
+    Returns:
+        Suggestion dicts in the same order as items (same shape as
+        generate_ticket_suggestions; failed items get a basic suggestion)
+    
+    Raises:
+        ValueError: If the items are invalid (see validate_suggestion_batch_items)
+            or a listing does not exist
+    """
+    error = validate_suggestion_batch_items(items)
+    if error:
+        raise ValueError(error)
+    
+    if not _has_api_key():
+        return [_basic_suggestion(item['issue_title'], item.get('issue_details') or '') for item in items]
+    
+    results: List[Optional[Dict]] = [None] * len(items)
+    pending = []  # (index, cache_key, issue_title, issue_details)
+    prompts = []
+    
+    for index, item in enumerate(items):
+        listing_id = item['listing_id']
+        issue_title = item['issue_title']
+        issue_details = item.get('issue_details') or ''
+        
+        cache_key = _suggestion_cache_key(listing_id, issue_title, issue_details)
+        cached = _get_cached_suggestion(cache_key)
+        if cached is not None:
+            results[index] = _apply_due_date(cached)
+            continue
+        
+        listing_name, listing_address = _get_listing_label(listing_id)
+        pending.append((index, cache_key, issue_title, issue_details))
+        prompts.append(_build_prompt(listing_name, listing_address, issue_title, issue_details))
+    
+    if not prompts:
+        return results
+    
+    responses = asyncio.run(_request_suggestions(prompts))
+    
+    for (index, cache_key, issue_title, issue_details), response in zip(pending, responses):
+        try:
+            if isinstance(response, BaseException):
+                raise response
+            result_dict = _parse_suggestions(response, issue_title)
+        except Exception:
+            import traceback
+            traceback.print_exc()
+            results[index] = _basic_suggestion(issue_title, issue_details)
+            continue
+        
+        _cache_suggestion(cache_key, result_dict)
+        results[index] = _apply_due_date(result_dict)
+    
+    return results
@@ -4,18 +4,25 @@ Image processing utilities for ticket and comment images.
 Handles validation, optimization, and thumbnail generation.
 """
 
+import io
 import os
 import uuid
 from pathlib import Path
 from typing import Tuple, Optional, Dict
 from werkzeug.datastructures import FileStorage
-from PIL import Image
+from PIL import Image, ImageOps, UnidentifiedImageError, features
 import logging
 
 logger = logging.getLogger(__name__)
 
+# JPEG encode/decode dominates upload processing; stock libjpeg is several times slower
+# than libjpeg-turbo (which the official Pillow wheels bundle)
+if features.check_codec('jpg') and not features.check_feature('libjpeg_turbo'):
+    logger.warning("Pillow is not built against libjpeg-turbo - image uploads will be slower")
+
 # Register HEIF opener for HEIC/HEIF support if available
 try:
+    import pillow_heif
     from pillow_heif import register_heif_opener
     register_heif_opener()
     HEIF_SUPPORT = True
@@ -35,25 +42,47 @@ ALLOWED_MIME_TYPES = {
 }
 
 # Allowed file extensions
-ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.heic', '.heif'}
+ALLOWED_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.webp', '.gif', '.heic', '.heif'})
+
+# HEIC/HEIF uploads (converted to JPEG during processing)
+HEIF_EXTENSIONS = frozenset({'.heic', '.heif'})
+HEIF_MIME_TYPES = frozenset({'image/heic', 'image/heif'})
+
+# Allow-lists as shown in validation errors
+_ALLOWED_EXTENSIONS_MSG = ', '.join(sorted(ALLOWED_EXTENSIONS))
+_ALLOWED_MIME_TYPES_MSG = ', '.join(sorted(ALLOWED_MIME_TYPES))
+
+# Decoded formats (as reported by PIL) accepted for non-HEIC uploads.
+# MPO is what PIL calls the multi-picture JPEGs many phone cameras write.
+ALLOWED_IMAGE_FORMATS = frozenset({'JPEG', 'MPO', 'PNG', 'WEBP', 'GIF'})
 
 # Max file size: 2MB
 MAX_FILE_SIZE = 2 * 1024 * 1024
 
+# Max decoded size. A small, highly compressed file can declare a huge canvas
+# (decompression bomb), so dimensions are checked from the header before decoding.
+# Pillow's process-wide Image.MAX_IMAGE_PIXELS is left alone (other modules use PIL).
+MAX_PIXELS = 50_000_000
+
 # Image optimization settings
 MAX_WIDTH = 1920
 MAX_HEIGHT = 1920
 JPEG_QUALITY = 85
+# Two-pass Huffman optimization: a few percent smaller files for noticeably more
+# encode CPU per upload. Thumbnails never use it.
+JPEG_OPTIMIZE = False
 THUMBNAIL_SIZE = 300
+THUMBNAIL_QUALITY = 75
 
 
-def validate_image(file: FileStorage) -> Tuple[bool, Optional[str]]:
+def validate_image(file: FileStorage, file_path: str) -> Tuple[bool, Optional[str]]:
     """
-    Validate an uploaded image file.
+    Validate an uploaded image file after it has been saved to disk.
     Note: Large files (>2MB) are accepted but will be saved as thumbnails only.
     
     Args:
-        file: Werkzeug FileStorage object
+        file: Werkzeug FileStorage object (for filename and content type)
+        file_path: Path the upload was saved to
         
     Returns:
         Tuple of (is_valid, error_message)
@@ -62,9 +91,7 @@ def validate_image(file: FileStorage) -> Tuple[bool, Optional[str]]:
         return False, "No file provided"
     
     # Check file size (allow any size, but will create thumbnail only if >2MB)
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    file.seek(0)  # Reset to beginning
+    file_size = os.stat(file_path).st_size
     
     if file_size == 0:
         return False, "File is empty"
@@ -77,35 +104,44 @@ def validate_image(file: FileStorage) -> Tuple[bool, Optional[str]]:
     mime_type = file.content_type or ''
     
     # Allow HEIC/HEIF files - they will be converted to JPEG
-    is_heic = ext in {'.heic', '.heif'} or mime_type in {'image/heic', 'image/heif'}
+    is_heic = ext in HEIF_EXTENSIONS or mime_type in HEIF_MIME_TYPES
     
     if not is_heic:
         # For non-HEIC files, check extension and MIME type
         if ext not in ALLOWED_EXTENSIONS:
-            return False, f"File type not allowed. Allowed types: {', '.join(sorted(ALLOWED_EXTENSIONS))}"
+            return False, f"File type not allowed. Allowed types: {_ALLOWED_EXTENSIONS_MSG}"
         
         if mime_type and mime_type not in ALLOWED_MIME_TYPES:
-            return False, f"MIME type not allowed. Allowed types: {', '.join(sorted(ALLOWED_MIME_TYPES.keys()))}"
+            return False, f"MIME type not allowed. Allowed types: {_ALLOWED_MIME_TYPES_MSG}"
     
     # Validate that it's actually an image by trying to open it
-    # HEIF opener is already registered at module level if available
-    # For HEIC files, PIL might not be able to open them directly from FileStorage
-    # even with pillow-heif, so we'll be more lenient and let processing handle it
+    # HEIF opener is already registered at module level if available,
+    # but HEIC decoding is left to processing, which reports a clearer error
     if is_heic:
         # For HEIC files, skip strict validation - we'll validate during processing
-        # This is because PIL might not be able to open HEIC from FileStorage directly
-        file.seek(0)
         return True, None
     
-    # For non-HEIC files, validate by trying to open
+    # For non-HEIC files, probe the header only - Image.open() identifies the format
+    # without decoding pixel data; corrupt pixel data still fails during processing
     try:
-        file.seek(0)
-        img = Image.open(file)
-        img.verify()  # Verify it's a valid image
-        file.seek(0)  # Reset after verify
+        with Image.open(file_path) as img:
+            image_format = img.format
+            pixel_count = img.width * img.height
+    except Image.DecompressionBombError:
+        # PIL refuses outright past twice its own Image.MAX_IMAGE_PIXELS
+        return False, "Image too large"
+    except UnidentifiedImageError:
+        # PIL's message names the temp file path, which shouldn't reach the client
+        return False, "Invalid image file: unrecognized image format"
     except Exception as e:
         return False, f"Invalid image file: {str(e)}"
     
+    if image_format not in ALLOWED_IMAGE_FORMATS:
+        return False, f"Image format not allowed: {image_format}"
+    
+    if pixel_count > MAX_PIXELS:
+        return False, "Image too large"
+    
     return True, None
 
 
@@ -132,6 +168,90 @@ def get_image_info(file_path: str) -> Dict[str, any]:
         return {'width': None, 'height': None, 'format': None, 'mode': None}
 
 
+def _open_image(path: Path) -> Image.Image:
+    """
+    Open an image, explaining a missing pillow-heif when a HEIC/HEIF file can't be read.
+    
+    HEIF support is registered once at import (see HEIF_SUPPORT). HEIC/HEIF files
+    are decoded with libheif directly and wrapped with Image.frombuffer, which
+    shares libheif's pixel buffer instead of copying it into a new PIL image
+    the way the plugin's load() does.
+    """
+    if HEIF_SUPPORT and path.suffix.lower() in HEIF_EXTENSIONS and pillow_heif.is_supported(str(path)):
+        heif_file = pillow_heif.open_heif(str(path), convert_hdr_to_8bit=True)
+        # HEIC skips validate_image's header checks; the size is known before .data decodes
+        if heif_file.size[0] * heif_file.size[1] > MAX_PIXELS:
+            raise ValueError("Image too large")
+        return Image.frombuffer(heif_file.mode, heif_file.size, heif_file.data,
+                                'raw', heif_file.mode, heif_file.stride, 1)
+    
+    try:
+        return Image.open(path)
+    except UnidentifiedImageError:
+        if path.suffix.lower() in HEIF_EXTENSIONS and not HEIF_SUPPORT:
+            raise ValueError("HEIC/HEIF support requires pillow-heif package. Please install it with: pip install pillow-heif")
+        raise
+
+
+def _draft_to_fit(img: Image.Image, max_width: int, max_height: int, cover: bool = False) -> None:
+    """
+    Let the JPEG decoder downscale (1/2, 1/4 or 1/8) while decoding.
+    
+    Must be called before the image is loaded. The decoded image stays at least
+    as large as the size the image will be resized to, so the LANCZOS resize
+    afterwards still sets the final quality. No-op for other formats.
+    
+    Args:
+        img: Freshly opened image
+        max_width: Target box width
+        max_height: Target box height
+        cover: The image will be cropped to fill the box (keep the short side
+            at least box-sized) rather than shrunk to fit inside it
+    """
+    scale = (max if cover else min)(max_width / img.width, max_height / img.height)
+    if scale < 1:
+        img.draft(None, (max(1, int(img.width * scale)), max(1, int(img.height * scale))))
+
+
+def _convert_to_rgb(img: Image.Image) -> Image.Image:
+    """Convert an image to RGB for JPEG output, flattening transparency onto white"""
+    # Palette images without a transparent color and fully opaque alpha images
+    # convert directly - compositing them onto white would not change a pixel
+    if img.mode == 'P' and 'transparency' not in img.info:
+        return img.convert('RGB')
+    if img.mode in ('RGBA', 'LA') and img.getchannel('A').getextrema()[0] == 255:
+        return img.convert('RGB')
+    
+    if img.mode in ('RGBA', 'LA', 'P'):
+        # Create white background
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+        return background
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def _square_thumbnail(img: Image.Image, size: int) -> Image.Image:
+    """Center-crop an RGB image to a square and shrink it to `size` (never enlarged)"""
+    # fit() crops to the square first, so only the kept region is resampled
+    side = min(size, img.width, img.height)
+    return ImageOps.fit(img, (side, side), method=Image.Resampling.LANCZOS, centering=(0.5, 0.5))
+
+
+def _save_jpeg(img: Image.Image, output_path: str, **options) -> None:
+    """
+    Encode an image as JPEG in memory and write it with a single write.
+    
+    A failed encode never leaves a truncated file at output_path.
+    """
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', **options)
+    Path(output_path).write_bytes(buffer.getbuffer())
+
+
 def optimize_image(file_path: str, max_width: int = MAX_WIDTH, max_height: int = MAX_HEIGHT, 
                    quality: int = JPEG_QUALITY) -> Tuple[str, int, int]:
     """
@@ -148,26 +268,14 @@ def optimize_image(file_path: str, max_width: int = MAX_WIDTH, max_height: int =
         Tuple of (output_path, width, height)
     """
     try:
-        # Ensure HEIF opener is registered if file is HEIC/HEIF
-        file_ext = Path(file_path).suffix.lower()
-        if file_ext in {'.heic', '.heif'}:
-            try:
-                from pillow_heif import register_heif_opener
-                register_heif_opener()
-            except ImportError:
-                raise ValueError(f"HEIC/HEIF support requires pillow-heif package. Please install it with: pip install pillow-heif")
+        source = Path(file_path)
         
-        with Image.open(file_path) as img:
+        with _open_image(source) as img:
+            # Decode oversized JPEGs at reduced scale
+            _draft_to_fit(img, max_width, max_height)
+            
             # Convert RGBA to RGB for JPEG
-            if img.mode in ('RGBA', 'LA', 'P'):
-                # Create white background
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
+            img = _convert_to_rgb(img)
             
             original_width, original_height = img.size
             
@@ -176,10 +284,10 @@ def optimize_image(file_path: str, max_width: int = MAX_WIDTH, max_height: int =
                 img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
             
             # Generate output filename
-            output_path = str(Path(file_path).with_suffix('.jpg'))
+            output_path = str(source.with_suffix('.jpg'))
             
             # Save optimized image
-            img.save(output_path, 'JPEG', quality=quality, optimize=True)
+            _save_jpeg(img, output_path, quality=quality, optimize=JPEG_OPTIMIZE)
             
             width, height = img.size
             
@@ -207,44 +315,19 @@ def create_thumbnail(file_path: str, size: int = THUMBNAIL_SIZE) -> str:
         Path to thumbnail file
     """
     try:
-        # Ensure HEIF opener is registered if file is HEIC/HEIF
-        file_ext = Path(file_path).suffix.lower()
-        if file_ext in {'.heic', '.heif'}:
-            try:
-                from pillow_heif import register_heif_opener
-                register_heif_opener()
-            except ImportError:
-                raise ValueError(f"HEIC/HEIF support requires pillow-heif package. Please install it with: pip install pillow-heif")
+        source = Path(file_path)
         
-        with Image.open(file_path) as img:
-            # Convert to RGB if needed
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Create thumbnail (maintain aspect ratio, then crop to square)
-            img.thumbnail((size, size), Image.Resampling.LANCZOS)
+        with _open_image(source) as img:
+            _draft_to_fit(img, size, size, cover=True)
             
-            # Crop to square if needed
-            width, height = img.size
-            if width != height:
-                # Center crop
-                left = (width - min(width, height)) // 2
-                top = (height - min(width, height)) // 2
-                right = left + min(width, height)
-                bottom = top + min(width, height)
-                img = img.crop((left, top, right, bottom))
+            # Convert to RGB if needed
+            img = _square_thumbnail(_convert_to_rgb(img), size)
             
             # Generate thumbnail filename
-            thumbnail_path = str(Path(file_path).with_name(f"{Path(file_path).stem}_thumb.jpg"))
+            thumbnail_path = str(source.with_name(f"{source.stem}_thumb.jpg"))
             
             # Save thumbnail
-            img.save(thumbnail_path, 'JPEG', quality=85, optimize=True)
+            _save_jpeg(img, thumbnail_path, quality=THUMBNAIL_QUALITY)
             
             return thumbnail_path
             
@@ -253,6 +336,60 @@ def create_thumbnail(file_path: str, size: int = THUMBNAIL_SIZE) -> str:
         raise
 
 
+def process_image(file_path: str, output_path: Optional[str] = None, thumbnail_path: Optional[str] = None,
+                  max_width: int = MAX_WIDTH, max_height: int = MAX_HEIGHT, quality: int = JPEG_QUALITY,
+                  thumbnail_size: int = THUMBNAIL_SIZE) -> Tuple[str, int, int, str]:
+    """
+    Optimize an image and create its thumbnail from a single decode.
+    
+    Same output as optimize_image() followed by create_thumbnail(), but the
+    source is decoded once and the thumbnail is cut from the resized image
+    instead of re-reading the optimized JPEG. The source file is removed.
+    
+    Args:
+        file_path: Path to source image file
+        output_path: Where to write the optimized JPEG (default: source path with .jpg)
+        thumbnail_path: Where to write the thumbnail (default: <output stem>_thumb.jpg)
+        max_width: Maximum width in pixels
+        max_height: Maximum height in pixels
+        quality: JPEG quality (1-100)
+        thumbnail_size: Thumbnail size (square, in pixels)
+        
+    Returns:
+        Tuple of (output_path, width, height, thumbnail_path)
+    """
+    source = Path(file_path)
+    output = Path(output_path) if output_path else source.with_suffix('.jpg')
+    output_path = str(output)
+    thumbnail_path = thumbnail_path or str(output.with_name(f"{output.stem}_thumb.jpg"))
+    
+    try:
+        with _open_image(source) as img:
+            # Decode oversized JPEGs at reduced scale
+            _draft_to_fit(img, max_width, max_height)
+            img = _convert_to_rgb(img)
+            
+            # Resize if needed (maintain aspect ratio)
+            if img.width > max_width or img.height > max_height:
+                img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+            
+            _save_jpeg(img, output_path, quality=quality, optimize=JPEG_OPTIMIZE)
+            width, height = img.size
+            
+            # The thumbnail starts from the (already downscaled) image in memory
+            thumb = _square_thumbnail(img.copy(), thumbnail_size)
+            _save_jpeg(thumb, thumbnail_path, quality=THUMBNAIL_QUALITY)
+        
+        if output_path != file_path and os.path.exists(file_path):
+            os.remove(file_path)
+        
+        return output_path, width, height, thumbnail_path
+        
+    except Exception as e:
+        logger.error(f"Error processing image {file_path}: {e}")
+        raise
+
+
 def save_uploaded_image(file: FileStorage, base_dir: str, subfolder: str) -> Tuple[str, str, int, int, Optional[str]]:
     """
     Save an uploaded image file, optimize it, and create a thumbnail.
@@ -266,15 +403,8 @@ def save_uploaded_image(file: FileStorage, base_dir: str, subfolder: str) -> Tup
     Returns:
         Tuple of (file_path, file_name, width, height, thumbnail_path)
     """
-    # Validate image
-    is_valid, error = validate_image(file)
-    if not is_valid:
-        raise ValueError(error)
-    
-    # Check file size
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    file.seek(0)
+    if not file:
+        raise ValueError("No file provided")
     
     # Create directory structure
     upload_dir = Path(base_dir) / 'images' / subfolder
@@ -292,27 +422,23 @@ def save_uploaded_image(file: FileStorage, base_dir: str, subfolder: str) -> Tup
     temp_path = upload_dir / f"temp_{unique_filename}"
     
     # Save original file temporarily (with original extension for HEIC files)
-    # CRITICAL: Reset file stream position and ensure we read the actual file content
+    # CRITICAL: Reset file stream position so the whole upload is written
     # This is especially important for mobile/iCloud uploads where file objects might be references
     file.seek(0)
     
     # Log file details for debugging
     logger.debug(f"Saving file: filename={file.filename}, content_type={file.content_type}, content_length={file.content_length if hasattr(file, 'content_length') else 'unknown'}")
     
-    # Read the file content into memory to ensure we get the actual file data
-    # This prevents issues with file object references from mobile/iCloud
-    file_content = file.read()
-    file.seek(0)  # Reset again after read
-    
-    # Write the content to temp file
-    with open(str(temp_path), 'wb') as f:
-        f.write(file_content)
+    # Stream the upload straight to the temp file (no in-memory copy), then validate it there
+    file.save(str(temp_path))
     
-    # Verify the file was written correctly
-    if not temp_path.exists() or temp_path.stat().st_size == 0:
-        raise ValueError(f"Failed to save temporary file: {temp_path}")
+    is_valid, error = validate_image(file, str(temp_path))
+    if not is_valid:
+        temp_path.unlink(missing_ok=True)
+        raise ValueError(error)
     
-    logger.debug(f"Saved temp file: {temp_path}, size={temp_path.stat().st_size} bytes")
+    file_size = temp_path.stat().st_size
+    logger.debug(f"Saved temp file: {temp_path}, size={file_size} bytes")
     
     # If file exceeds 2MB, only create and save thumbnail
     if file_size > MAX_FILE_SIZE:
@@ -325,20 +451,17 @@ def save_uploaded_image(file: FileStorage, base_dir: str, subfolder: str) -> Tup
             with Image.open(thumbnail_path) as thumb_img:
                 thumb_width, thumb_height = thumb_img.size
             
-            # Use thumbnail as the main image (copy it to the main filename)
+            # Use thumbnail as the main image (atomic rename to the main filename, no copy)
             final_path = upload_dir / unique_filename
-            import shutil
-            shutil.copy2(thumbnail_path, final_path)
+            Path(thumbnail_path).replace(final_path)
             
             # Get relative paths
             relative_path = f"images/{subfolder}/{final_path.name}"
             relative_thumbnail_path = relative_path  # Same file for oversized images
             
-            # Clean up temp files
+            # Clean up temp file
             if temp_path.exists():
                 temp_path.unlink()
-            if thumbnail_path != str(final_path) and Path(thumbnail_path).exists():
-                Path(thumbnail_path).unlink()
             
             return (
                 relative_path,
@@ -354,31 +477,19 @@ def save_uploaded_image(file: FileStorage, base_dir: str, subfolder: str) -> Tup
             raise ValueError(f"Error processing large image: {str(e)}")
     
     # Normal processing for files <= 2MB
-    # Optimize image (HEIF opener is already registered at module level if available)
-    optimized_path, width, height = optimize_image(str(temp_path))
-    
-    # Remove "temp_" prefix from optimized filename if present
-    optimized_path_obj = Path(optimized_path)
-    if optimized_path_obj.name.startswith('temp_'):
-        # Rename to remove "temp_" prefix
-        final_optimized_path = optimized_path_obj.parent / optimized_path_obj.name[5:]  # Remove "temp_" (5 chars)
-        if optimized_path != str(final_optimized_path):
-            import shutil
-            shutil.move(str(optimized_path), str(final_optimized_path))
-            optimized_path = str(final_optimized_path)
-    
-    # Create thumbnail
-    thumbnail_path = create_thumbnail(optimized_path)
-    
-    # Remove "temp_" prefix from thumbnail filename if present
-    thumbnail_path_obj = Path(thumbnail_path)
-    if thumbnail_path_obj.name.startswith('temp_'):
-        # Rename to remove "temp_" prefix
-        final_thumbnail_path = thumbnail_path_obj.parent / thumbnail_path_obj.name[5:]  # Remove "temp_" (5 chars)
-        if thumbnail_path != str(final_thumbnail_path):
-            import shutil
-            shutil.move(str(thumbnail_path), str(final_thumbnail_path))
-            thumbnail_path = str(final_thumbnail_path)
+    # Optimize and thumbnail in one decode, writing straight to the final (non-temp) names
+    # (HEIF opener is already registered at module level if available)
+    stem = Path(unique_filename).stem
+    try:
+        optimized_path, width, height, thumbnail_path = process_image(
+            str(temp_path),
+            output_path=str(upload_dir / f"{stem}.jpg"),
+            thumbnail_path=str(upload_dir / f"{stem}_thumb.jpg")
+        )
+    except Exception:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
     
     # Get relative paths for database storage
     relative_path = f"images/{subfolder}/{Path(optimized_path).name}"
@@ -6,11 +6,15 @@ Ticket database models and utilities.
 import sys
 import os
 import logging
+import math
+import threading
 from datetime import datetime, date
 from typing import Optional, List
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Date, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Date, Boolean, UniqueConstraint, Index, and_, func, literal, or_, select
 import sqlalchemy
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import aliased, joinedload, raiseload, relationship, selectinload, sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.types import JSON
 from pathlib import Path
 
@@ -20,22 +24,122 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 sys.path.insert(0, project_root)
 
 import dashboard.config as config
-from dashboard.auth.models import Base, get_engine, get_session as get_user_session
+from dashboard.auth.models import Base, User, get_engine, get_session as get_user_session
+from database.models import ListingTag, Tag
 
 # Alias for external use
 get_session = get_user_session
 
-# Ticket statuses
-TICKET_STATUSES = ['Open', 'Assigned', 'In Progress', 'Blocked', 'Resolved', 'Closed']
-TICKET_PRIORITIES = ['Low', 'Medium', 'High', 'Critical']
-TICKET_CATEGORIES = ['cleaning', 'maintenance', 'online', 'technology', 'review management', 'other']
+# Ticket database engine (singleton pattern), resolved once from the shared
+# user database engine cache
+_engine = None
+
+# Session factory for the CRUD helpers below (singleton pattern). It binds the
+# pooled engine once and keeps attributes loaded after commit, since every
+# helper hands back detached objects.
+_session_factory = None
+
+
+def _get_engine():
+    """Get the engine for the ticket tables (resolved on first use)."""
+    global _engine
+    if _engine is None:
+        _engine = get_engine(config.USERS_DATABASE_PATH)
+    return _engine
+
+
+def _get_ticket_session():
+    """Open a session from the shared ticket sessionmaker (created on first use)."""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(bind=_get_engine(), expire_on_commit=False)
+    return _session_factory()
+
+
+# Ticket statuses (ordered for display)
+TICKET_STATUSES = ('Open', 'Assigned', 'In Progress', 'Blocked', 'Resolved', 'Closed')
+TICKET_PRIORITIES = ('Low', 'Medium', 'High', 'Critical')
+TICKET_CATEGORIES = ('cleaning', 'maintenance', 'online', 'technology', 'review management', 'other')
+
+# Sets for membership checks when validating input
+VALID_TICKET_STATUSES = frozenset(TICKET_STATUSES)
+VALID_TICKET_PRIORITIES = frozenset(TICKET_PRIORITIES)
+VALID_TICKET_CATEGORIES = frozenset(TICKET_CATEGORIES)
+
+
+def _ticket_fields(t, assigned_user_name, assigned_user_email, created_by_name, created_by_email) -> dict:
+    """
+    Build the column part of Ticket.to_dict().
+    
+    Args:
+        t: Ticket instance or a row with the same column attributes
+        assigned_user_name, assigned_user_email: Assignee details (None if unassigned)
+        created_by_name, created_by_email: Creator details
+    
+    Returns:
+        Dictionary of ticket fields (without listing_ids, comments or images)
+    """
+    # Read each date/derived column once (every attribute read on a Ticket goes
+    # through SQLAlchemy's instrumented descriptor); this runs per row in list views
+    due_date = t.due_date
+    created_at = t.created_at
+    updated_at = t.updated_at
+    initial_due_date = t.initial_due_date
+    is_recurring = t.is_recurring
+    reopen_days = t.reopen_days_before_due_date
+    recurrence_type = t.recurrence_type
+    return {
+        'ticket_id': t.ticket_id,
+        'listing_id': t.listing_id,
+        'issue_title': t.issue_title,
+        'title': t.title,
+        'description': t.description,
+        'assigned_user_id': t.assigned_user_id,
+        'assigned_user_name': assigned_user_name,
+        'assigned_user_email': assigned_user_email,
+        'status': t.status,
+        'priority': t.priority,
+        'category': t.category,
+        'due_date': due_date.isoformat() if due_date else None,
+        'created_by': t.created_by,
+        'created_by_name': created_by_name,
+        'created_by_email': created_by_email,
+        'created_at': created_at.isoformat() if created_at else None,
+        'updated_at': updated_at.isoformat() if updated_at else None,
+        'is_recurring': is_recurring,
+        'is_recurring_active': t.is_recurring_active,
+        'frequency_value': t.frequency_value,
+        'frequency_unit': t.frequency_unit,
+        'initial_due_date': initial_due_date.isoformat() if initial_due_date else None,
+        'recurring_admin_id': t.recurring_admin_id,
+        'reopen_days_before_due_date': reopen_days if reopen_days is not None else 10,
+        'recurrence_type': recurrence_type if recurrence_type else ('frequency' if is_recurring else None),
+        'recurrence_weekdays': t.recurrence_weekdays,
+        'recurrence_month_day': t.recurrence_month_day,
+        'recurrence_quarter_month': t.recurrence_quarter_month,
+        'recurrence_quarter_day': t.recurrence_quarter_day,
+        'recurrence_annual_dates': t.recurrence_annual_dates,
+    }
+
+
+# Schema placement, fixed at import: PostgreSQL keeps tickets and users in their
+# own schemas, SQLite uses unqualified table names
+_use_schemas = bool(os.getenv("DATABASE_URL"))
+_tickets_table_args = {'schema': 'tickets'} if _use_schemas else {}
+_tickets_fk_schema = 'tickets.' if _use_schemas else ''
+_users_fk_schema = 'users.' if _use_schemas else ''
 
 
 class Ticket(Base):
     """Ticket model for action items tied to listing issues."""
     __tablename__ = 'tickets'
     __table_args__ = (
-        {'schema': 'tickets'} if os.getenv("DATABASE_URL") else {},
+        # Ticket lists filter on these columns and always order by created_at DESC
+        # (a B-tree is scanned backwards for DESC, so ascending columns suffice)
+        Index('idx_tickets_listing_created', 'listing_id', 'created_at'),
+        Index('idx_tickets_assignee_status_created', 'assigned_user_id', 'status', 'created_at'),
+        Index('idx_tickets_status_priority_created', 'status', 'priority', 'created_at'),
+        _tickets_table_args,
     )
     
     ticket_id = Column(Integer, primary_key=True, autoincrement=True)
@@ -43,8 +147,6 @@ class Ticket(Base):
     issue_title = Column(String, nullable=False)  # The issue title this ticket addresses
     title = Column(String, nullable=False)
     description = Column(Text)
-    # Foreign key reference - adjust schema prefix for PostgreSQL
-    _users_fk_schema = 'users.' if os.getenv("DATABASE_URL") else ''
     assigned_user_id = Column(Integer, ForeignKey(f'{_users_fk_schema}users.user_id'), nullable=True, index=True)
     status = Column(String, nullable=False, default='Open', index=True)
     priority = Column(String, default='Low')
@@ -72,69 +174,44 @@ class Ticket(Base):
     recurrence_annual_dates = Column(Text, nullable=True)  # Comma-separated "MM-DD" format (e.g., "04-10,10-15") or JSON array
     
     # Relationships
-    assigned_user = relationship('User', foreign_keys=[assigned_user_id])
-    creator = relationship('User', foreign_keys=[created_by])
-    comments = relationship('TicketComment', back_populates='ticket', cascade='all, delete-orphan', order_by='TicketComment.created_at')
-    tags = relationship('TicketTag', back_populates='ticket', cascade='all, delete-orphan')
-    images = relationship('TicketImage', back_populates='ticket', cascade='all, delete-orphan', order_by='TicketImage.created_at')
-    listings = relationship('TicketListing', back_populates='ticket', cascade='all, delete-orphan')  # Many-to-many with listings
+    # Users must be eager-loaded (joinedload/selectinload) by whoever needs them;
+    # lazy='raise' turns an accidental per-ticket lazy load into an error
+    assigned_user = relationship('User', foreign_keys=[assigned_user_id], lazy='raise')
+    creator = relationship('User', foreign_keys=[created_by], lazy='raise')
+    comments = relationship('TicketComment', back_populates='ticket', cascade='all, delete-orphan', order_by='TicketComment.created_at', passive_deletes=True)
+    tags = relationship('TicketTag', back_populates='ticket', cascade='all, delete-orphan', passive_deletes=True)
+    images = relationship('TicketImage', back_populates='ticket', cascade='all, delete-orphan', order_by='TicketImage.created_at', passive_deletes=True)
+    listings = relationship('TicketListing', back_populates='ticket', cascade='all, delete-orphan', passive_deletes=True)  # Many-to-many with listings
     
     def __repr__(self):
         return f"<Ticket(ticket_id={self.ticket_id}, title='{self.title}', status='{self.status}')>"
     
     def to_dict(self, include_comments=False):
         """Convert ticket to dictionary."""
-        result = {
-            'ticket_id': self.ticket_id,
-            'listing_id': self.listing_id,
-            'issue_title': self.issue_title,
-            'title': self.title,
-            'description': self.description,
-            'assigned_user_id': self.assigned_user_id,
-            'assigned_user_name': self.assigned_user.name if self.assigned_user else None,
-            'assigned_user_email': self.assigned_user.email if self.assigned_user else None,
-            'status': self.status,
-            'priority': self.priority,
-            'category': self.category,
-            'due_date': self.due_date.isoformat() if self.due_date else None,
-            'created_by': self.created_by,
-            'created_by_name': self.creator.name if self.creator else None,
-            'created_by_email': self.creator.email if self.creator else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'is_recurring': self.is_recurring,
-            'is_recurring_active': self.is_recurring_active,
-            'frequency_value': self.frequency_value,
-            'frequency_unit': self.frequency_unit,
-            'initial_due_date': self.initial_due_date.isoformat() if self.initial_due_date else None,
-            'recurring_admin_id': self.recurring_admin_id,
-            'reopen_days_before_due_date': self.reopen_days_before_due_date if self.reopen_days_before_due_date is not None else 10,
-            'recurrence_type': self.recurrence_type if self.recurrence_type else ('frequency' if self.is_recurring else None),
-            'recurrence_weekdays': self.recurrence_weekdays,
-            'recurrence_month_day': self.recurrence_month_day,
-            'recurrence_quarter_month': self.recurrence_quarter_month,
-            'recurrence_quarter_day': self.recurrence_quarter_day,
-            'recurrence_annual_dates': self.recurrence_annual_dates,
-        }
+        assigned_user = self.assigned_user
+        creator = self.creator
+        result = _ticket_fields(
+            self,
+            assigned_user.name if assigned_user else None,
+            assigned_user.email if assigned_user else None,
+            creator.name if creator else None,
+            creator.email if creator else None
+        )
         
-        # Include listing IDs from TicketListing junction table
-        # Use try/except to handle detached instances gracefully
-        try:
-            if hasattr(self, 'listings') and self.listings:
-                # Access listings in a way that doesn't trigger lazy load if detached
-                listings_list = list(self.listings) if self.listings else []
-                result['listing_ids'] = [tl.listing_id for tl in listings_list]
-            else:
-                result['listing_ids'] = [self.listing_id] if self.listing_id else []
-        except Exception:
-            # If listings can't be accessed (detached instance), fall back to listing_id
+        # Include listing IDs from TicketListing junction table (every loader of a
+        # serialized ticket eager-loads listings); tickets created before the
+        # junction table existed fall back to listing_id
+        listings = self.listings
+        if listings:
+            result['listing_ids'] = [tl.listing_id for tl in listings]
+        else:
             result['listing_ids'] = [self.listing_id] if self.listing_id else []
         
         if include_comments:
             result['comments'] = [comment.to_dict() for comment in self.comments]
         
         # Include images
-        result['images'] = [img.to_dict() for img in self.images] if hasattr(self, 'images') else []
+        result['images'] = [img.to_dict() for img in self.images]
         
         return result
 
@@ -143,13 +220,10 @@ class TicketComment(Base):
     """Comment model for ticket discussions."""
     __tablename__ = 'ticket_comments'
     __table_args__ = (
-        {'schema': 'tickets'} if os.getenv("DATABASE_URL") else {},
+        _tickets_table_args,
     )
     
     comment_id = Column(Integer, primary_key=True, autoincrement=True)
-    # Foreign key references - adjust schema prefix for PostgreSQL
-    _tickets_fk_schema = 'tickets.' if os.getenv("DATABASE_URL") else ''
-    _users_fk_schema = 'users.' if os.getenv("DATABASE_URL") else ''
     ticket_id = Column(Integer, ForeignKey(f'{_tickets_fk_schema}tickets.ticket_id', ondelete='CASCADE'), nullable=False, index=True)
     user_id = Column(Integer, ForeignKey(f'{_users_fk_schema}users.user_id'), nullable=False)
     comment_text = Column(Text, nullable=False)
@@ -157,7 +231,7 @@ class TicketComment(Base):
     
     # Relationships
     ticket = relationship('Ticket', back_populates='comments')
-    user = relationship('User', foreign_keys=[user_id])
+    user = relationship('User', foreign_keys=[user_id], lazy='raise')  # Eager-load where needed
     images = relationship('CommentImage', back_populates='comment', cascade='all, delete-orphan', order_by='CommentImage.created_at')
     
     def __repr__(self):
@@ -165,28 +239,21 @@ class TicketComment(Base):
     
     def to_dict(self):
         """Convert comment to dictionary."""
+        user = self.user
+        created_at = self.created_at
         result = {
             'comment_id': self.comment_id,
             'ticket_id': self.ticket_id,
             'user_id': self.user_id,
-            'user_name': self.user.name if self.user else None,
-            'user_email': self.user.email if self.user else None,
-            'user_picture_url': self.user.picture_url if self.user else None,
+            'user_name': user.name if user else None,
+            'user_email': user.email if user else None,
+            'user_picture_url': user.picture_url if user else None,
             'comment_text': self.comment_text,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': created_at.isoformat() if created_at else None,
         }
         
-        # Include images - safely access the relationship
-        try:
-            if hasattr(self, 'images'):
-                # Access images to ensure they're loaded
-                images_list = list(self.images) if self.images else []
-                result['images'] = [img.to_dict() for img in images_list]
-            else:
-                result['images'] = []
-        except Exception as e:
-            # If there's an error accessing images (e.g., detached instance), return empty list
-            result['images'] = []
+        # Include images (eager-loaded by every query that serializes comments)
+        result['images'] = [img.to_dict() for img in self.images]
         
         return result
 
@@ -195,11 +262,9 @@ class TicketListing(Base):
     """Junction table for many-to-many relationship between tickets and listings"""
     __tablename__ = 'ticket_listings'
     __table_args__ = (
-        {'schema': 'tickets'} if os.getenv("DATABASE_URL") else {},
+        _tickets_table_args,
     )
     
-    # Foreign key references - adjust schema prefix for PostgreSQL
-    _tickets_fk_schema = 'tickets.' if os.getenv("DATABASE_URL") else ''
     
     ticket_id = Column(Integer, ForeignKey(f'{_tickets_fk_schema}tickets.ticket_id', ondelete='CASCADE'), primary_key=True, nullable=False, index=True)
     # listing_id references listings table in main database (public schema) - no FK constraint since it's cross-database
@@ -217,11 +282,9 @@ class TicketTag(Base):
     """Junction table for many-to-many relationship between tickets and tags"""
     __tablename__ = 'ticket_tags'
     __table_args__ = (
-        {'schema': 'tickets'} if os.getenv("DATABASE_URL") else {},
+        _tickets_table_args,
     )
     
-    # Foreign key references - adjust schema prefix for PostgreSQL
-    _tickets_fk_schema = 'tickets.' if os.getenv("DATABASE_URL") else ''
     
     ticket_id = Column(Integer, ForeignKey(f'{_tickets_fk_schema}tickets.ticket_id', ondelete='CASCADE'), primary_key=True, nullable=False, index=True)
     # tag_id references tags table in main database (public schema) - no FK constraint since it's cross-database
@@ -241,13 +304,10 @@ class TicketImage(Base):
     """Image model for ticket attachments."""
     __tablename__ = 'ticket_images'
     __table_args__ = (
-        {'schema': 'tickets'} if os.getenv("DATABASE_URL") else {},
+        _tickets_table_args,
     )
     
     image_id = Column(Integer, primary_key=True, autoincrement=True)
-    # Foreign key references - adjust schema prefix for PostgreSQL
-    _tickets_fk_schema = 'tickets.' if os.getenv("DATABASE_URL") else ''
-    _users_fk_schema = 'users.' if os.getenv("DATABASE_URL") else ''
     ticket_id = Column(Integer, ForeignKey(f'{_tickets_fk_schema}tickets.ticket_id', ondelete='CASCADE'), nullable=False, index=True)
     file_path = Column(String, nullable=False)  # Relative path to image file
     file_name = Column(String, nullable=False)  # Original filename
@@ -288,13 +348,10 @@ class CommentImage(Base):
     """Image model for comment attachments."""
     __tablename__ = 'comment_images'
     __table_args__ = (
-        {'schema': 'tickets'} if os.getenv("DATABASE_URL") else {},
+        _tickets_table_args,
     )
     
     image_id = Column(Integer, primary_key=True, autoincrement=True)
-    # Foreign key references - adjust schema prefix for PostgreSQL
-    _tickets_fk_schema = 'tickets.' if os.getenv("DATABASE_URL") else ''
-    _users_fk_schema = 'users.' if os.getenv("DATABASE_URL") else ''
     comment_id = Column(Integer, ForeignKey(f'{_tickets_fk_schema}ticket_comments.comment_id', ondelete='CASCADE'), nullable=False, index=True)
     file_path = Column(String, nullable=False)  # Relative path to image file
     file_name = Column(String, nullable=False)  # Original filename
@@ -335,20 +392,20 @@ class ActivityLog(Base):
     """Activity log model for tracking user activities."""
     __tablename__ = 'activity_logs'
     __table_args__ = (
-        {'schema': 'tickets'} if os.getenv("DATABASE_URL") else {},
+        # Per-user activity feeds filter on user_id and order by created_at
+        Index('idx_activity_logs_user_created', 'user_id', 'created_at'),
+        _tickets_table_args,
     )
     
     activity_id = Column(Integer, primary_key=True, autoincrement=True)
-    # Foreign key references - adjust schema prefix for PostgreSQL
-    _users_fk_schema = 'users.' if os.getenv("DATABASE_URL") else ''
     user_id = Column(Integer, ForeignKey(f'{_users_fk_schema}users.user_id'), nullable=False, index=True)
     activity_type = Column(String, nullable=False, index=True)  # 'ticket', 'auth', 'comment'
     entity_type = Column(String, nullable=False)  # 'ticket', 'user', 'comment'
     entity_id = Column(Integer, nullable=True, index=True)  # ID of the entity (ticket_id, user_id, etc.)
     action = Column(String, nullable=False, index=True)  # 'create', 'update', 'delete', 'login', 'logout', 'status_change', 'assign', etc.
-    # Use JSONB for PostgreSQL, JSON for SQLite - will be set in __init_subclass__ or migration
+    # Use JSONB for PostgreSQL, JSON for SQLite (matches the migration's CREATE TABLE)
     # Note: 'metadata' is reserved in SQLAlchemy, so we use 'activity_metadata'
-    activity_metadata = Column(JSON, nullable=True)  # Flexible JSON for additional context (JSONB for PostgreSQL handled in migration)
+    activity_metadata = Column(JSONB if _use_schemas else JSON, nullable=True)  # Flexible JSON for additional context
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     
     # Relationships
@@ -373,12 +430,25 @@ class ActivityLog(Base):
         }
 
 
+# Engines whose ticket tables were created and migrated by this process.
+# Startup reaches init_ticket_database() from several places; the schema
+# checks only need to run once per engine.
+_initialized_engines = set()
+_initialized_engines_lock = threading.Lock()
+
+# Version of the ticket migrations below, recorded in ticket_schema_version once
+# they have all run. Bump it whenever a _migrate_* step is added or changed so
+# existing databases run the migrations again.
+TICKET_SCHEMA_VERSION = 2
+
+
 def init_ticket_database():
     """
     Initialize the ticket tables in the user database.
     Supports PostgreSQL (creates schema) and SQLite.
+    Repeat calls for an already initialized engine return it without
+    touching the database.
     """
-    import os
     
     # Tickets use the same database as users
     db_path = config.USERS_DATABASE_PATH
@@ -389,7 +459,11 @@ def init_ticket_database():
         db_dir = Path(db_path).parent
         db_dir.mkdir(parents=True, exist_ok=True)
     
-    engine = get_engine(db_path)
+    engine = _get_engine()
+    engine_key = str(engine.url)
+    with _initialized_engines_lock:
+        if engine_key in _initialized_engines:
+            return engine
     
     # For PostgreSQL, create schema if it doesn't exist
     if database_url:
@@ -410,96 +484,195 @@ def init_ticket_database():
         else:
             raise e
     
-    # SQLite-specific migrations (skip for PostgreSQL)
-    if not database_url:
-        # Migrate tickets table if needed (add category column, make listing_id nullable)
-        _migrate_tickets_table(engine)
-        # Migrate image tables if needed
-        _migrate_image_tables(engine)
-        # Migrate recurring fields to tickets table
-        _migrate_tickets_recurring_table(engine)
-        # Migrate enhanced recurrence type fields
-        _migrate_recurrence_types_table(engine)
-        # Migrate activity_logs table
-        _migrate_activity_logs_table(engine)
-        # Migrate ticket_listings junction table
-        _migrate_ticket_listings_table(engine)
-    else:
-        # PostgreSQL: Migrate to make listing_id nullable
-        _migrate_listing_id_nullable(engine)
-        # Migrate recurring fields to tickets table
-        _migrate_tickets_recurring_table(engine)
-        # Migrate enhanced recurrence type fields
-        _migrate_recurrence_types_table(engine)
-        # Migrate activity_logs table
-        _migrate_activity_logs_table(engine)
-        # Migrate ticket_listings junction table
-        _migrate_ticket_listings_table(engine)
+    # Databases that already ran this version of the migrations skip them
+    if _get_ticket_schema_version(engine) == TICKET_SCHEMA_VERSION:
+        with _initialized_engines_lock:
+            _initialized_engines.add(engine_key)
+        return engine
     
+    # Run every migration on one connection in a single transaction (one
+    # commit). Steps that may fail run in a savepoint so they don't abort the
+    # rest, and return False when they did.
+    with engine.begin() as conn:
+        results = []
+        # SQLite-specific migrations (skip for PostgreSQL)
+        if not database_url:
+            # Migrate tickets table if needed (add category column, make listing_id nullable)
+            results.append(_migrate_tickets_table(conn))
+            # Migrate image tables if needed
+            results.append(_migrate_image_tables(conn))
+            # Migrate recurring fields to tickets table
+            results.append(_migrate_tickets_recurring_table(conn))
+            # Migrate enhanced recurrence type fields
+            results.append(_migrate_recurrence_types_table(conn))
+            # Migrate activity_logs table
+            results.append(_migrate_activity_logs_table(conn))
+            # Migrate ticket_listings junction table
+            results.append(_migrate_ticket_listings_table(conn))
+            # Composite indexes for ticket lists
+            results.append(_migrate_ticket_indexes(conn))
+        else:
+            # PostgreSQL: Migrate to make listing_id nullable
+            results.append(_migrate_listing_id_nullable(conn))
+            # Migrate recurring fields to tickets table
+            results.append(_migrate_tickets_recurring_table(conn))
+            # Migrate enhanced recurrence type fields
+            results.append(_migrate_recurrence_types_table(conn))
+            # Migrate activity_logs table
+            results.append(_migrate_activity_logs_table(conn))
+            # Migrate ticket_listings junction table
+            results.append(_migrate_ticket_listings_table(conn))
+            # Composite indexes for ticket lists
+            results.append(_migrate_ticket_indexes(conn))
+        
+        # Record the version in the same transaction as the migrations, and
+        # only when every step succeeded so failed steps run again next start
+        migrated = all(results)
+        if migrated:
+            _set_ticket_schema_version(conn, TICKET_SCHEMA_VERSION)
+        else:
+            logger.warning("Ticket migrations incomplete; they will be retried on the next start")
+    
+    with _initialized_engines_lock:
+        _initialized_engines.add(engine_key)
     return engine
 
 
-def _migrate_tickets_table(engine):
+def _ticket_schema_version_table() -> str:
+    return 'tickets.ticket_schema_version' if _use_schemas else 'ticket_schema_version'
+
+
+def _get_ticket_schema_version(engine) -> Optional[int]:
+    """
+    Get the ticket migration version recorded in the database.
+    
+    Returns:
+        Recorded version, or None if none has been recorded yet
+    """
+    try:
+        with engine.connect() as conn:
+            return conn.execute(sqlalchemy.text(
+                f"SELECT MAX(version) FROM {_ticket_schema_version_table()}"
+            )).scalar()
+    except Exception:
+        # Table doesn't exist yet
+        return None
+
+
+def _set_ticket_schema_version(conn, version: int):
+    """Record the ticket migration version (inside the migration transaction)."""
+    table = _ticket_schema_version_table()
+    conn.execute(sqlalchemy.text(f"CREATE TABLE IF NOT EXISTS {table} (version INTEGER PRIMARY KEY)"))
+    conn.execute(sqlalchemy.text(f"DELETE FROM {table}"))
+    conn.execute(sqlalchemy.text(f"INSERT INTO {table} (version) VALUES (:version)"), {'version': version})
+
+
+def _get_pg_ticket_columns(conn) -> set:
+    """Get the column names of tickets.tickets with one information_schema query (PostgreSQL)."""
+    result = conn.execute(sqlalchemy.text("""
+        SELECT column_name 
+        FROM information_schema.columns 
+        WHERE table_schema = 'tickets' 
+        AND table_name = 'tickets'
+    """))
+    return {row[0] for row in result}
+
+
+def _add_missing_columns(conn, table: str, columns_to_add, existing_columns: set) -> bool:
+    """
+    Add columns to a table, skipping those that already exist.
+    
+    Each ALTER runs in a savepoint, so a column added concurrently by another
+    process is ignored without aborting the surrounding transaction.
+    
+    Args:
+        conn: Connection inside the migration transaction
+        table: Table name (schema-qualified for PostgreSQL)
+        columns_to_add: (column name, column type) pairs
+        existing_columns: Column names the table already has
+    
+    Returns:
+        True if every missing column was added, False if any ALTER failed
+    """
+    ok = True
+    for col_name, col_type in columns_to_add:
+        if col_name in existing_columns:
+            continue
+        try:
+            with conn.begin_nested():
+                conn.execute(sqlalchemy.text(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}"))
+        except Exception as e:
+            # Column might have been added concurrently; the next start re-checks it
+            logger.warning(f"Error adding column {col_name} to {table}: {e}")
+            ok = False
+    return ok
+
+
+def _migrate_tickets_table(conn) -> bool:
     """Add category column to tickets table if it doesn't exist and set default for existing records"""
-    import sqlalchemy
-    with engine.connect() as conn:
-        # Check if tickets table exists
-        result = conn.execute(sqlalchemy.text(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name='tickets'"
-        ))
-        if not result.fetchone():
-            return  # Table doesn't exist, create_all will handle it
-        
-        # Get existing columns
-        result = conn.execute(sqlalchemy.text("PRAGMA table_info(tickets)"))
-        existing_columns = {row[1] for row in result.fetchall()}
-        
-        # Add category column if missing
-        if 'category' not in existing_columns:
-            try:
+    try:
+        with conn.begin_nested():
+            # Check if tickets table exists
+            result = conn.execute(sqlalchemy.text(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='tickets'"
+            ))
+            if not result.fetchone():
+                return True  # Table doesn't exist, create_all will handle it
+            
+            # Get existing columns
+            result = conn.execute(sqlalchemy.text("PRAGMA table_info(tickets)"))
+            existing_columns = {row[1] for row in result.fetchall()}
+            
+            # Add category column if missing
+            if 'category' not in existing_columns:
                 # SQLite doesn't support NOT NULL with default in ALTER TABLE, so add as nullable first
                 conn.execute(sqlalchemy.text("ALTER TABLE tickets ADD COLUMN category TEXT"))
-                # Update all existing records to 'other'
-                conn.execute(sqlalchemy.text("UPDATE tickets SET category = 'other' WHERE category IS NULL"))
-                conn.commit()
-            except Exception as e:
-                conn.rollback()
-                # Column might already exist, ignore
-                pass
-        else:
-            # Column exists, but ensure all NULL values are set to 'other'
-            try:
-                conn.execute(sqlalchemy.text("UPDATE tickets SET category = 'other' WHERE category IS NULL"))
-                conn.commit()
-            except Exception as e:
-                conn.rollback()
-                pass
-        
-        # Migrate 'communication' to 'online' for existing records
-        try:
+            
+            # Set existing records without a category to 'other'
+            conn.execute(sqlalchemy.text("UPDATE tickets SET category = 'other' WHERE category IS NULL"))
+            
+            # Migrate 'communication' to 'online' for existing records
             conn.execute(sqlalchemy.text("UPDATE tickets SET category = 'online' WHERE category = 'communication'"))
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            pass
+        return True
+    except Exception as e:
+        logger.warning(f"Error migrating tickets table: {e}")
+        return False
+
+
+def _migrate_ticket_indexes(conn) -> bool:
+    """Create the composite ticket list and activity feed indexes on existing tables (create_all skips them)."""
+    table = 'tickets.tickets' if _use_schemas else 'tickets'
+    activity_table = 'tickets.activity_logs' if _use_schemas else 'activity_logs'
+    try:
+        with conn.begin_nested():
+            for index_sql in (
+                f"CREATE INDEX IF NOT EXISTS idx_tickets_listing_created ON {table} (listing_id, created_at)",
+                f"CREATE INDEX IF NOT EXISTS idx_tickets_assignee_status_created ON {table} (assigned_user_id, status, created_at)",
+                f"CREATE INDEX IF NOT EXISTS idx_tickets_status_priority_created ON {table} (status, priority, created_at)",
+                f"CREATE INDEX IF NOT EXISTS idx_activity_logs_user_created ON {activity_table} (user_id, created_at)",
+            ):
+                conn.execute(sqlalchemy.text(index_sql))
+        return True
+    except Exception as e:
+        logger.warning(f"Error creating ticket indexes: {e}")
+        return False
 
 
-def _migrate_listing_id_nullable(engine):
+def _migrate_listing_id_nullable(conn) -> bool:
     """Make listing_id nullable in tickets table (PostgreSQL only)."""
-    import sqlalchemy
     database_url = os.getenv("DATABASE_URL")
     
     if not database_url:
-        return  # SQLite migration handled separately
+        return True  # SQLite migration handled separately
     
     try:
-        with engine.connect() as conn:
+        with conn.begin_nested():
             # Check if tickets table exists
             result = conn.execute(sqlalchemy.text(
                 "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_schema = 'tickets' AND table_name = 'tickets')"
             ))
             if not result.scalar():
-                return  # Table doesn't exist, create_all will handle it
+                return True  # Table doesn't exist, create_all will handle it
             
             # Check if listing_id is already nullable
             result = conn.execute(sqlalchemy.text("""
@@ -511,225 +684,164 @@ def _migrate_listing_id_nullable(engine):
             """))
             row = result.fetchone()
             if row and row[0] == 'YES':
-                return  # Already nullable
+                return True  # Already nullable
             
             # Make listing_id nullable
             conn.execute(sqlalchemy.text("ALTER TABLE tickets.tickets ALTER COLUMN listing_id DROP NOT NULL"))
-            conn.commit()
             logger.info("Migrated tickets.listing_id to be nullable")
+        return True
     except Exception as e:
         logger.warning(f"Error migrating listing_id to nullable: {e}")
-        # Migration might have already been applied, ignore
+        return False
 
 
-def _migrate_image_tables(engine):
+def _migrate_image_tables(conn) -> bool:
     """Create image tables if they don't exist (SQLite only)."""
-    import sqlalchemy
-    with engine.connect() as conn:
-        # Check if ticket_images table exists
+    # Check if ticket_images table exists
+    result = conn.execute(sqlalchemy.text(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name='ticket_images'"
+    ))
+    if not result.fetchone():
+        # Table doesn't exist, create_all will handle it
+        return True
+    
+    # Check if comment_images table exists
+    result = conn.execute(sqlalchemy.text(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name='comment_images'"
+    ))
+    if not result.fetchone():
+        # Table doesn't exist, create_all will handle it
+        return True
+    
+    return True
+
+
+def _migrate_tickets_recurring_table(conn) -> bool:
+    """Add recurring task columns to tickets table if they don't exist"""
+    database_url = os.getenv("DATABASE_URL")
+    
+    if not database_url:
+        # SQLite migration
+        # Check if tickets table exists
         result = conn.execute(sqlalchemy.text(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name='ticket_images'"
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='tickets'"
         ))
         if not result.fetchone():
-            # Table doesn't exist, create_all will handle it
-            return
+            return True  # Table doesn't exist, create_all will handle it
         
-        # Check if comment_images table exists
+        # Get existing columns
+        result = conn.execute(sqlalchemy.text("PRAGMA table_info(tickets)"))
+        existing_columns = {row[1] for row in result.fetchall()}
+        
+        # Add columns if missing (idempotent)
+        return _add_missing_columns(conn, 'tickets', [
+            ('is_recurring', 'INTEGER DEFAULT 0'),
+            ('is_recurring_active', 'INTEGER DEFAULT 1'),
+            ('frequency_value', 'INTEGER'),
+            ('frequency_unit', 'TEXT'),
+            ('initial_due_date', 'DATE'),
+            ('recurring_admin_id', 'INTEGER'),
+            ('reopen_days_before_due_date', 'INTEGER DEFAULT 10'),
+        ], existing_columns)
+    else:
+        # PostgreSQL migration
+        # Check if tickets table exists
         result = conn.execute(sqlalchemy.text(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name='comment_images'"
+            "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_schema = 'tickets' AND table_name = 'tickets')"
         ))
-        if not result.fetchone():
-            # Table doesn't exist, create_all will handle it
-            return
-
-
-def _migrate_tickets_recurring_table(engine):
-    """Add recurring task columns to tickets table if they don't exist"""
-    import sqlalchemy
-    database_url = os.getenv("DATABASE_URL")
-    
-    with engine.connect() as conn:
-        if not database_url:
-            # SQLite migration
-            # Check if tickets table exists
-            result = conn.execute(sqlalchemy.text(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='tickets'"
-            ))
-            if not result.fetchone():
-                return  # Table doesn't exist, create_all will handle it
-            
-            # Get existing columns
-            result = conn.execute(sqlalchemy.text("PRAGMA table_info(tickets)"))
-            existing_columns = {row[1] for row in result.fetchall()}
-            
-            # Add columns if missing (idempotent)
-            columns_to_add = [
-                ('is_recurring', 'INTEGER DEFAULT 0'),
-                ('is_recurring_active', 'INTEGER DEFAULT 1'),
-                ('frequency_value', 'INTEGER'),
-                ('frequency_unit', 'TEXT'),
-                ('initial_due_date', 'DATE'),
-                ('recurring_admin_id', 'INTEGER'),
-                ('reopen_days_before_due_date', 'INTEGER DEFAULT 10'),
-            ]
-            
-            for col_name, col_type in columns_to_add:
-                if col_name not in existing_columns:
-                    try:
-                        conn.execute(sqlalchemy.text(f"ALTER TABLE tickets ADD COLUMN {col_name} {col_type}"))
-                        conn.commit()
-                    except Exception as e:
-                        conn.rollback()
-                        # Column might already exist, ignore
-                        pass
-        else:
-            # PostgreSQL migration
-            # Check if tickets table exists
-            result = conn.execute(sqlalchemy.text(
-                "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_schema = 'tickets' AND table_name = 'tickets')"
-            ))
-            if not result.scalar():
-                return  # Table doesn't exist, create_all will handle it
-            
-            # Check and add columns
-            columns_to_add = [
-                ('is_recurring', 'BOOLEAN DEFAULT FALSE'),
-                ('is_recurring_active', 'BOOLEAN DEFAULT TRUE'),
-                ('frequency_value', 'INTEGER'),
-                ('frequency_unit', 'VARCHAR'),
-                ('initial_due_date', 'DATE'),
-                ('recurring_admin_id', 'INTEGER'),
-                ('reopen_days_before_due_date', 'INTEGER DEFAULT 10'),
-            ]
-            
-            for col_name, col_type in columns_to_add:
-                # Check if column exists
-                result = conn.execute(sqlalchemy.text("""
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.columns 
-                        WHERE table_schema = 'tickets' 
-                        AND table_name = 'tickets' 
-                        AND column_name = :col_name
-                    )
-                """), {'col_name': col_name})
-                if not result.scalar():
-                    try:
-                        conn.execute(sqlalchemy.text(f"ALTER TABLE tickets.tickets ADD COLUMN {col_name} {col_type}"))
-                        conn.commit()
-                    except Exception as e:
-                        conn.rollback()
-                        # Column might already exist, ignore
-            pass
+        if not result.scalar():
+            return True  # Table doesn't exist, create_all will handle it
+        
+        # Check and add columns
+        return _add_missing_columns(conn, 'tickets.tickets', [
+            ('is_recurring', 'BOOLEAN DEFAULT FALSE'),
+            ('is_recurring_active', 'BOOLEAN DEFAULT TRUE'),
+            ('frequency_value', 'INTEGER'),
+            ('frequency_unit', 'VARCHAR'),
+            ('initial_due_date', 'DATE'),
+            ('recurring_admin_id', 'INTEGER'),
+            ('reopen_days_before_due_date', 'INTEGER DEFAULT 10'),
+        ], _get_pg_ticket_columns(conn))
 
 
-def _migrate_recurrence_types_table(engine):
+def _migrate_recurrence_types_table(conn) -> bool:
     """Add enhanced recurrence type columns to tickets table if they don't exist"""
-    import sqlalchemy
     database_url = os.getenv("DATABASE_URL")
     
-    with engine.connect() as conn:
-        if not database_url:
-            # SQLite migration
-            # Check if tickets table exists
-            result = conn.execute(sqlalchemy.text(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='tickets'"
-            ))
-            if not result.fetchone():
-                return  # Table doesn't exist, create_all will handle it
-            
-            # Get existing columns
-            result = conn.execute(sqlalchemy.text("PRAGMA table_info(tickets)"))
-            existing_columns = {row[1] for row in result.fetchall()}
-            
-            # Add columns if missing (idempotent)
-            columns_to_add = [
-                ('recurrence_type', 'TEXT DEFAULT \'frequency\''),
-                ('recurrence_weekdays', 'TEXT'),
-                ('recurrence_month_day', 'INTEGER'),
-                ('recurrence_quarter_month', 'INTEGER'),
-                ('recurrence_quarter_day', 'INTEGER'),
-                ('recurrence_annual_dates', 'TEXT'),
-            ]
-            
-            for col_name, col_type in columns_to_add:
-                if col_name not in existing_columns:
-                    try:
-                        conn.execute(sqlalchemy.text(f"ALTER TABLE tickets ADD COLUMN {col_name} {col_type}"))
-                        conn.commit()
-                    except Exception as e:
-                        conn.rollback()
-                        # Column might already exist, ignore
-                        pass
-            
-            # Set default recurrence_type for existing recurring tickets
-            try:
+    if not database_url:
+        # SQLite migration
+        # Check if tickets table exists
+        result = conn.execute(sqlalchemy.text(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='tickets'"
+        ))
+        if not result.fetchone():
+            return True  # Table doesn't exist, create_all will handle it
+        
+        # Get existing columns
+        result = conn.execute(sqlalchemy.text("PRAGMA table_info(tickets)"))
+        existing_columns = {row[1] for row in result.fetchall()}
+        
+        # Add columns if missing (idempotent)
+        ok = _add_missing_columns(conn, 'tickets', [
+            ('recurrence_type', 'TEXT DEFAULT \'frequency\''),
+            ('recurrence_weekdays', 'TEXT'),
+            ('recurrence_month_day', 'INTEGER'),
+            ('recurrence_quarter_month', 'INTEGER'),
+            ('recurrence_quarter_day', 'INTEGER'),
+            ('recurrence_annual_dates', 'TEXT'),
+        ], existing_columns)
+        
+        # Set default recurrence_type for existing recurring tickets
+        try:
+            with conn.begin_nested():
                 conn.execute(sqlalchemy.text("""
                     UPDATE tickets 
                     SET recurrence_type = 'frequency' 
                     WHERE is_recurring = 1 AND (recurrence_type IS NULL OR recurrence_type = '')
                 """))
-                conn.commit()
-            except Exception as e:
-                conn.rollback()
-                pass
-        else:
-            # PostgreSQL migration
-            # Check if tickets table exists
-            result = conn.execute(sqlalchemy.text(
-                "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_schema = 'tickets' AND table_name = 'tickets')"
-            ))
-            if not result.scalar():
-                return  # Table doesn't exist, create_all will handle it
-            
-            # Check and add columns
-            columns_to_add = [
-                ('recurrence_type', 'VARCHAR DEFAULT \'frequency\''),
-                ('recurrence_weekdays', 'TEXT'),
-                ('recurrence_month_day', 'INTEGER'),
-                ('recurrence_quarter_month', 'INTEGER'),
-                ('recurrence_quarter_day', 'INTEGER'),
-                ('recurrence_annual_dates', 'TEXT'),
-            ]
-            
-            for col_name, col_type in columns_to_add:
-                # Check if column exists
-                result = conn.execute(sqlalchemy.text("""
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.columns 
-                        WHERE table_schema = 'tickets' 
-                        AND table_name = 'tickets' 
-                        AND column_name = :col_name
-                    )
-                """), {'col_name': col_name})
-                if not result.scalar():
-                    try:
-                        conn.execute(sqlalchemy.text(f"ALTER TABLE tickets.tickets ADD COLUMN {col_name} {col_type}"))
-                        conn.commit()
-                    except Exception as e:
-                        conn.rollback()
-                        # Column might already exist, ignore
-                        pass
-            
-            # Set default recurrence_type for existing recurring tickets
-            try:
+        except Exception as e:
+            logger.warning(f"Error setting default recurrence_type: {e}")
+            ok = False
+    else:
+        # PostgreSQL migration
+        # Check if tickets table exists
+        result = conn.execute(sqlalchemy.text(
+            "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_schema = 'tickets' AND table_name = 'tickets')"
+        ))
+        if not result.scalar():
+            return True  # Table doesn't exist, create_all will handle it
+        
+        # Check and add columns
+        ok = _add_missing_columns(conn, 'tickets.tickets', [
+            ('recurrence_type', 'VARCHAR DEFAULT \'frequency\''),
+            ('recurrence_weekdays', 'TEXT'),
+            ('recurrence_month_day', 'INTEGER'),
+            ('recurrence_quarter_month', 'INTEGER'),
+            ('recurrence_quarter_day', 'INTEGER'),
+            ('recurrence_annual_dates', 'TEXT'),
+        ], _get_pg_ticket_columns(conn))
+        
+        # Set default recurrence_type for existing recurring tickets
+        try:
+            with conn.begin_nested():
                 conn.execute(sqlalchemy.text("""
                     UPDATE tickets.tickets 
                     SET recurrence_type = 'frequency' 
                     WHERE is_recurring = TRUE AND (recurrence_type IS NULL OR recurrence_type = '')
                 """))
-                conn.commit()
-            except Exception as e:
-                conn.rollback()
-                pass
+        except Exception as e:
+            logger.warning(f"Error setting default recurrence_type: {e}")
+            ok = False
+    
+    return ok
 
 
-def _migrate_ticket_listings_table(engine):
+def _migrate_ticket_listings_table(conn) -> bool:
     """Create ticket_listings junction table if it doesn't exist."""
-    import sqlalchemy
     database_url = os.getenv("DATABASE_URL")
     
     try:
-        with engine.connect() as conn:
+        with conn.begin_nested():
             if not database_url:
                 # SQLite migration
                 result = conn.execute(sqlalchemy.text(
@@ -749,7 +861,6 @@ def _migrate_ticket_listings_table(engine):
                     # Create indexes
                     conn.execute(sqlalchemy.text("CREATE INDEX IF NOT EXISTS idx_ticket_listings_ticket ON ticket_listings(ticket_id)"))
                     conn.execute(sqlalchemy.text("CREATE INDEX IF NOT EXISTS idx_ticket_listings_listing ON ticket_listings(listing_id)"))
-                    conn.commit()
                     logger.info("Created ticket_listings table")
             else:
                 # PostgreSQL migration
@@ -774,82 +885,142 @@ def _migrate_ticket_listings_table(engine):
                     # Create indexes
                     conn.execute(sqlalchemy.text("CREATE INDEX IF NOT EXISTS idx_ticket_listings_ticket ON tickets.ticket_listings(ticket_id)"))
                     conn.execute(sqlalchemy.text("CREATE INDEX IF NOT EXISTS idx_ticket_listings_listing ON tickets.ticket_listings(listing_id)"))
-                    conn.commit()
                     logger.info("Created tickets.ticket_listings table")
+        return True
     except Exception as e:
         logger.warning(f"Error migrating ticket_listings table: {e}")
-        # Table might already exist, ignore
+        return False
 
 
-def _migrate_activity_logs_table(engine):
+def _migrate_activity_logs_table(conn) -> bool:
     """Create activity_logs table if it doesn't exist."""
-    import sqlalchemy
     database_url = os.getenv("DATABASE_URL")
     
-    with engine.connect() as conn:
-        if not database_url:
-            # SQLite migration
-            # Check if activity_logs table exists
-            result = conn.execute(sqlalchemy.text(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='activity_logs'"
-            ))
-            if result.fetchone():
-                return  # Table already exists
-            
-            # Table will be created by create_all, but we ensure it exists
-            # create_all will handle it
-            return
-        else:
-            # PostgreSQL migration
-            # Check if activity_logs table exists
-            result = conn.execute(sqlalchemy.text("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_schema = 'tickets' 
-                    AND table_name = 'activity_logs'
-                )
-            """))
-            if result.scalar():
-                return  # Table already exists
-            
-            # Create table with JSONB for activity_metadata (metadata is reserved in SQLAlchemy)
-            from sqlalchemy.dialects.postgresql import JSONB
-            conn.execute(sqlalchemy.text("""
-                CREATE TABLE tickets.activity_logs (
-                    activity_id SERIAL PRIMARY KEY,
-                    user_id INTEGER NOT NULL REFERENCES users.users(user_id),
-                    activity_type VARCHAR NOT NULL,
-                    entity_type VARCHAR NOT NULL,
-                    entity_id INTEGER,
-                    action VARCHAR NOT NULL,
-                    activity_metadata JSONB,
-                    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
-                )
-            """))
-            
-            # Create indexes
-            conn.execute(sqlalchemy.text("CREATE INDEX idx_activity_logs_user_id ON tickets.activity_logs(user_id)"))
-            conn.execute(sqlalchemy.text("CREATE INDEX idx_activity_logs_activity_type ON tickets.activity_logs(activity_type)"))
-            conn.execute(sqlalchemy.text("CREATE INDEX idx_activity_logs_entity_id ON tickets.activity_logs(entity_id)"))
-            conn.execute(sqlalchemy.text("CREATE INDEX idx_activity_logs_action ON tickets.activity_logs(action)"))
-            conn.execute(sqlalchemy.text("CREATE INDEX idx_activity_logs_created_at ON tickets.activity_logs(created_at)"))
-            conn.execute(sqlalchemy.text("CREATE INDEX idx_activity_logs_type_created ON tickets.activity_logs(activity_type, created_at)"))
-            
-            conn.commit()
-            logger.info("Created activity_logs table with indexes")
+    if not database_url:
+        # SQLite migration
+        # Check if activity_logs table exists
+        result = conn.execute(sqlalchemy.text(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='activity_logs'"
+        ))
+        if result.fetchone():
+            return True  # Table already exists
+        
+        # Table will be created by create_all, but we ensure it exists
+        # create_all will handle it
+        return True
+    else:
+        # PostgreSQL migration
+        # Check if activity_logs table exists
+        result = conn.execute(sqlalchemy.text("""
+            SELECT EXISTS (
+                SELECT FROM information_schema.tables 
+                WHERE table_schema = 'tickets' 
+                AND table_name = 'activity_logs'
+            )
+        """))
+        if result.scalar():
+            return True  # Table already exists
+        
+        # Create table with JSONB for activity_metadata (metadata is reserved in SQLAlchemy)
+        conn.execute(sqlalchemy.text("""
+            CREATE TABLE tickets.activity_logs (
+                activity_id SERIAL PRIMARY KEY,
+                user_id INTEGER NOT NULL REFERENCES users.users(user_id),
+                activity_type VARCHAR NOT NULL,
+                entity_type VARCHAR NOT NULL,
+                entity_id INTEGER,
+                action VARCHAR NOT NULL,
+                activity_metadata JSONB,
+                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        
+        # Create indexes
+        conn.execute(sqlalchemy.text("CREATE INDEX idx_activity_logs_user_id ON tickets.activity_logs(user_id)"))
+        conn.execute(sqlalchemy.text("CREATE INDEX idx_activity_logs_activity_type ON tickets.activity_logs(activity_type)"))
+        conn.execute(sqlalchemy.text("CREATE INDEX idx_activity_logs_entity_id ON tickets.activity_logs(entity_id)"))
+        conn.execute(sqlalchemy.text("CREATE INDEX idx_activity_logs_action ON tickets.activity_logs(action)"))
+        conn.execute(sqlalchemy.text("CREATE INDEX idx_activity_logs_created_at ON tickets.activity_logs(created_at)"))
+        conn.execute(sqlalchemy.text("CREATE INDEX idx_activity_logs_type_created ON tickets.activity_logs(activity_type, created_at)"))
+        conn.execute(sqlalchemy.text("CREATE INDEX idx_activity_logs_user_created ON tickets.activity_logs(user_id, created_at)"))
+        
+        logger.info("Created activity_logs table with indexes")
+        return True
 
 
-def _safe_expunge(session, obj):
-    """Safely expunge an object from the session if it's present."""
-    if obj is None:
-        return
-    try:
-        # Check if object is in session before expunging
-        if obj in session:
-            session.expunge(obj)
-    except Exception:
-        # If expunge fails (object not in session), just ignore
-        pass
+def issue_title_filter(issue_title: str):
+    """
+    SQL pre-filter for tickets that may match an issue title.
+    
+    Keeps rows whose trimmed, lower-cased issue_title equals, contains or is
+    contained in the given title, and whose length is within the 80% ratio
+    of the given title's. filter_tickets_by_issue_title() still makes the
+    final decision, since SQL TRIM/LOWER differ slightly from str.strip/lower.
+    
+    Args:
+        issue_title: Issue title to match
+    
+    Returns:
+        SQLAlchemy boolean expression for Query.filter()
+    """
+    issue_title_normalized = issue_title.strip().lower()
+    query_len = len(issue_title_normalized)
+    ticket_issue_normalized = func.lower(func.trim(Ticket.issue_title))
+    # Integer form of "shorter >= 80% of longer" for either title being longer
+    return and_(
+        func.length(ticket_issue_normalized).between(math.ceil(query_len * 0.8), math.floor(query_len / 0.8)),
+        or_(
+            ticket_issue_normalized == issue_title_normalized,
+            ticket_issue_normalized.contains(issue_title_normalized, autoescape=True),
+            literal(issue_title_normalized).contains(ticket_issue_normalized)
+        )
+    )
+
+
+def filter_tickets_by_issue_title(tickets: List['Ticket'], issue_title: str) -> List['Ticket']:
+    """
+    Keep tickets whose issue_title meaningfully matches the given title.
+    
+    A ticket matches on a case-insensitive exact match (after trimming), or if
+    one title is contained in the other and the shorter is at least 80% of the
+    length of the longer.
+    
+    Args:
+        tickets: Tickets to filter (normally pre-filtered by issue_title_filter())
+        issue_title: Issue title to match
+    
+    Returns:
+        Matching tickets, in their original order
+    """
+    query_title = issue_title.strip().lower()
+    query_len = len(query_title)
+    query_threshold = query_len * 0.8
+    filtered_tickets = []
+    for t in tickets:
+        raw_title = t.issue_title
+        if not raw_title:
+            continue
+        ticket_title = raw_title.strip().lower()
+        # Case-insensitive exact match
+        if ticket_title == query_title:
+            filtered_tickets.append(t)
+            continue
+        # Or if one is a significant substring of the other (at least 80% length match).
+        # Same-length titles only match when equal, which was handled above.
+        ticket_len = len(ticket_title)
+        if ticket_len > query_len:
+            if query_len >= ticket_len * 0.8 and query_title in ticket_title:
+                filtered_tickets.append(t)
+        elif ticket_len < query_len:
+            if ticket_len >= query_threshold and ticket_title in query_title:
+                filtered_tickets.append(t)
+    return filtered_tickets
+
+
+# Columns update_ticket() may write (identity and creation fields are fixed)
+_TICKET_UPDATABLE_COLUMNS = frozenset(
+    column.key for column in Ticket.__table__.columns
+) - {'ticket_id', 'created_by', 'created_at'}
 
 
 
@@ -875,16 +1046,10 @@ def create_ticket(listing_id: int = None, listing_ids: List[int] = None, issue_t
     if not issue_title:
         raise ValueError("issue_title is required")
     
-    from sqlalchemy.orm import joinedload
-    import sys
-    import os
-    # Import main database models for tag inheritance
-    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    sys.path.insert(0, project_root)
-    from database.models import get_session as get_main_session, ListingTag
+    if category not in VALID_TICKET_CATEGORIES:
+        raise ValueError(f"Invalid category: {category}")
     
-    session = get_session()
-    main_session = get_main_session(config.MAIN_DATABASE_PATH)
+    session = _get_ticket_session()
     
     try:
         # Determine recurrence_type (default to 'frequency' for backward compatibility)
@@ -931,217 +1096,219 @@ def create_ticket(listing_id: int = None, listing_ids: List[int] = None, issue_t
             final_listing_ids = [listing_id]
         
         # Create TicketListing entries for all selected listings
-        for lid in final_listing_ids:
-            ticket_listing = TicketListing(
-                ticket_id=ticket_id,
-                listing_id=lid
-            )
-            session.add(ticket_listing)
+        ticket_listings = [TicketListing(ticket_id=ticket_id, listing_id=lid) for lid in final_listing_ids]
+        session.add_all(ticket_listings)
         
-        # Inherit tags from all selected properties
-        existing_tag_ids = set()
+        # Tags live in the main database, which shares the PostgreSQL database
+        # (public schema) with tickets, so each tag set is one INSERT ... SELECT
+        ticket_tags = TicketTag.__table__
+        inherited_tag_ids = None
         if final_listing_ids:
-            for lid in final_listing_ids:
-                listing_tags = main_session.query(ListingTag).filter(
-                    ListingTag.listing_id == lid
-                ).all()
-                
-                for listing_tag in listing_tags:
-                    # Avoid duplicate tags if multiple listings have the same tag
-                    if listing_tag.tag_id not in existing_tag_ids:
-                        existing_tag_ids.add(listing_tag.tag_id)
-                        ticket_tag = TicketTag(
-                            ticket_id=ticket_id,
-                            tag_id=listing_tag.tag_id,
-                            is_inherited=True
-                        )
-                        session.add(ticket_tag)
+            # Inherit tags from all selected properties (DISTINCT drops tags
+            # shared by several listings)
+            inherited_tag_ids = select(ListingTag.tag_id).where(ListingTag.listing_id.in_(final_listing_ids))
+            session.execute(ticket_tags.insert().from_select(
+                ['ticket_id', 'tag_id', 'is_inherited'],
+                select(literal(ticket_id), ListingTag.tag_id, literal(True))
+                .where(ListingTag.listing_id.in_(final_listing_ids))
+                .distinct()
+            ))
         
-        # Add user-selected tags (non-inherited)
+        # Add user-selected tags (non-inherited) that exist and are not already inherited
         if tag_ids:
-            from database.models import Tag
-            for tag_id in tag_ids:
-                # Skip if tag is already inherited
-                if tag_id in existing_tag_ids:
-                    continue
-                
-                # Verify tag exists in main database
-                tag = main_session.query(Tag).filter(Tag.tag_id == tag_id).first()
-                if tag:
-                    ticket_tag = TicketTag(
-                        ticket_id=ticket_id,
-                        tag_id=tag_id,
-                        is_inherited=False
-                    )
-                    session.add(ticket_tag)
+            selected_tags = select(literal(ticket_id), Tag.tag_id, literal(False)).where(Tag.tag_id.in_(tag_ids))
+            if inherited_tag_ids is not None:
+                selected_tags = selected_tags.where(Tag.tag_id.not_in(inherited_tag_ids))
+            session.execute(ticket_tags.insert().from_select(['ticket_id', 'tag_id', 'is_inherited'], selected_tags))
         
-        session.commit()
-        main_session.close()
+        # Populate relationships in place (one lookup for both users) instead
+        # of re-querying the ticket after commit
+        user_ids = {uid for uid in (assigned_user_id, created_by) if uid}
+        users = {u.user_id: u for u in session.query(User).filter(User.user_id.in_(user_ids))} if user_ids else {}
+        set_committed_value(ticket, 'assigned_user', users.get(assigned_user_id))
+        set_committed_value(ticket, 'creator', users.get(created_by))
+        set_committed_value(ticket, 'images', [])
+        set_committed_value(ticket, 'listings', ticket_listings)
         
-        # Re-query with eager loading to get relationships
-        ticket = session.query(Ticket).options(
-            joinedload(Ticket.assigned_user),
-            joinedload(Ticket.creator)
-        ).filter(Ticket.ticket_id == ticket_id).first()
+        session.commit()
         
-        if ticket:
-            # Access relationships while session is open to populate them
-            _ = ticket.assigned_user
-            _ = ticket.creator
-            
-            # Expunge to detach from session but keep loaded relationships
-            session.expunge(ticket)
-            _safe_expunge(session, ticket.assigned_user)
-            _safe_expunge(session, ticket.creator)
+        # Detach everything from the session but keep loaded relationships
+        session.expunge_all()
         
         return ticket
     except Exception as e:
         session.rollback()
-        if 'main_session' in locals():
-            main_session.rollback()
         raise e
     finally:
         session.close()
-        if 'main_session' in locals():
-            main_session.close()
 
 
 def get_ticket(ticket_id: int) -> Optional[Ticket]:
     """Get a ticket by ID with relationships eagerly loaded."""
-    from sqlalchemy.orm import joinedload
-    session = get_session()
+    session = _get_ticket_session()
     try:
-        ticket = session.query(Ticket).options(
+        # Users are joined (many-to-one); the image and listing collections use
+        # selectinload so they don't multiply each other's rows in one join
+        ticket = session.get(Ticket, ticket_id, options=[
             joinedload(Ticket.assigned_user),
             joinedload(Ticket.creator),
-            joinedload(Ticket.images),
-            joinedload(Ticket.listings)  # Eagerly load listings
-        ).filter(Ticket.ticket_id == ticket_id).first()
+            selectinload(Ticket.images).joinedload(TicketImage.uploader),
+            selectinload(Ticket.listings),
+            raiseload('*')  # Anything else to_dict() grows to read must be added above
+        ])
         
-        if ticket:
-            # Access relationships while session is open to populate them
-            _ = ticket.assigned_user
-            _ = ticket.creator
-            _ = ticket.images
-            _ = ticket.listings  # Access listings to populate them
-            
-            # Expunge to detach from session but keep loaded relationships
-            session.expunge(ticket)
-            _safe_expunge(session, ticket.assigned_user)
-            _safe_expunge(session, ticket.creator)
-            for img in ticket.images:
-                _safe_expunge(session, img)
-            for listing in ticket.listings:
-                _safe_expunge(session, listing)
+        # Detach everything from the session but keep loaded relationships
+        session.expunge_all()
         
         return ticket
     finally:
         session.close()
 
 
+def _filter_tickets_query(query, listing_id: int = None, assigned_user_id: int = None,
+                          status: str = None, priority: str = None, category: str = None, issue_title: str = None):
+    """Apply the get_tickets() filters and ordering to a Ticket query."""
+    if listing_id:
+        query = query.filter(Ticket.listing_id == listing_id)
+    if assigned_user_id:
+        query = query.filter(Ticket.assigned_user_id == assigned_user_id)
+    if status:
+        query = query.filter(Ticket.status == status)
+    if priority:
+        query = query.filter(Ticket.priority == priority)
+    if category:
+        query = query.filter(Ticket.category == category)
+    if issue_title:
+        # Narrow candidates in SQL; callers apply the exact match rules in Python
+        query = query.filter(issue_title_filter(issue_title))
+    return query.order_by(Ticket.created_at.desc())
+
+
 def get_tickets(listing_id: int = None, assigned_user_id: int = None,
                 status: str = None, priority: str = None, category: str = None, issue_title: str = None) -> List[Ticket]:
-    """Get tickets with optional filters and relationships eagerly loaded."""
-    from sqlalchemy.orm import joinedload
-    from sqlalchemy import func
-    session = get_session()
+    """Get tickets with optional filters and the assigned user/creator eagerly loaded.
+    
+    Other relationships raise on access; use query_ticket_rows() and
+    ticket_rows_to_dicts() for to_dict() output.
+    """
+    session = _get_ticket_session()
     try:
+        # selectinload fetches each user set with one IN query rather than
+        # joining users twice onto every ticket row
         query = session.query(Ticket).options(
-            joinedload(Ticket.assigned_user),
-            joinedload(Ticket.creator)
+            selectinload(Ticket.assigned_user),
+            selectinload(Ticket.creator),
+            raiseload('*')
         )
+        tickets = _filter_tickets_query(query, listing_id, assigned_user_id, status, priority, category, issue_title).all()
         
-        if listing_id:
-            query = query.filter(Ticket.listing_id == listing_id)
-        if assigned_user_id:
-            query = query.filter(Ticket.assigned_user_id == assigned_user_id)
-        if status:
-            query = query.filter(Ticket.status == status)
-        if priority:
-            query = query.filter(Ticket.priority == priority)
-        if category:
-            query = query.filter(Ticket.category == category)
-        tickets = query.order_by(Ticket.created_at.desc()).all()
-        
-        # Filter by issue_title in Python if provided (more reliable for whitespace handling)
         if issue_title:
-            issue_title_normalized = issue_title.strip().lower()
-            # Filter tickets where issue_title meaningfully matches (case-insensitive, after trimming)
-            filtered_tickets = []
-            for t in tickets:
-                if t.issue_title:
-                    ticket_issue_normalized = t.issue_title.strip().lower()
-                    # Case-insensitive exact match
-                    if ticket_issue_normalized == issue_title_normalized:
-                        filtered_tickets.append(t)
-                    # Or if one is a significant substring of the other (at least 80% length match)
-                    elif (len(ticket_issue_normalized) > 0 and len(issue_title_normalized) > 0):
-                        shorter = min(ticket_issue_normalized, issue_title_normalized, key=len)
-                        longer = max(ticket_issue_normalized, issue_title_normalized, key=len)
-                        # Only match if shorter is at least 80% of longer and is contained
-                        if len(shorter) >= len(longer) * 0.8 and shorter in longer:
-                            filtered_tickets.append(t)
-            tickets = filtered_tickets
+            tickets = filter_tickets_by_issue_title(tickets, issue_title)
         
-        # Access relationships while session is open and expunge to detach
-        for ticket in tickets:
-            _ = ticket.assigned_user
-            _ = ticket.creator
-            session.expunge(ticket)
-            _safe_expunge(session, ticket.assigned_user)
-            _safe_expunge(session, ticket.creator)
+        # Detach (relationships were eager-loaded above)
+        session.expunge_all()
         
         return tickets
     finally:
         session.close()
 
 
+def query_ticket_rows(query) -> list:
+    """
+    Run a Ticket query as plain column rows, without building ORM objects.
+    
+    Args:
+        query: session.query(Ticket) with filters and ordering applied
+            (loader options are not supported)
+    
+    Returns:
+        Rows with every Ticket column as an attribute, plus assigned_user_name,
+        assigned_user_email, created_by_name and created_by_email
+    """
+    assigned_user = aliased(User)
+    creator = aliased(User)
+    return query.outerjoin(
+        assigned_user, Ticket.assigned_user_id == assigned_user.user_id
+    ).outerjoin(
+        creator, Ticket.created_by == creator.user_id
+    ).with_entities(
+        *Ticket.__table__.columns,
+        assigned_user.name.label('assigned_user_name'),
+        assigned_user.email.label('assigned_user_email'),
+        creator.name.label('created_by_name'),
+        creator.email.label('created_by_email')
+    ).all()
+
+
+def ticket_rows_to_dicts(session, rows) -> List[dict]:
+    """
+    Convert rows from query_ticket_rows() to Ticket.to_dict() dictionaries.
+    
+    Listing ids and images are loaded with one query each for all rows.
+    
+    Args:
+        session: Session to load listings and images with
+        rows: Rows returned by query_ticket_rows()
+    
+    Returns:
+        List of ticket dictionaries, in row order
+    """
+    ticket_ids = [row.ticket_id for row in rows]
+    listing_ids_map = {}
+    images_map = {}
+    if ticket_ids:
+        for tl in session.query(TicketListing).filter(TicketListing.ticket_id.in_(ticket_ids)):
+            listing_ids_map.setdefault(tl.ticket_id, []).append(tl.listing_id)
+        images = session.query(TicketImage).options(
+            joinedload(TicketImage.uploader)
+        ).filter(TicketImage.ticket_id.in_(ticket_ids)).order_by(TicketImage.created_at)
+        for img in images:
+            images_map.setdefault(img.ticket_id, []).append(img.to_dict())
+    
+    result = []
+    for row in rows:
+        ticket_dict = _ticket_fields(
+            row, row.assigned_user_name, row.assigned_user_email, row.created_by_name, row.created_by_email
+        )
+        ticket_dict['listing_ids'] = listing_ids_map.get(row.ticket_id) or ([row.listing_id] if row.listing_id else [])
+        ticket_dict['images'] = images_map.get(row.ticket_id, [])
+        result.append(ticket_dict)
+    return result
+
+
 def update_ticket(ticket_id: int, **kwargs) -> Optional[Ticket]:
-    """Update a ticket with relationships eagerly loaded."""
-    from sqlalchemy.orm import joinedload
-    session = get_session()
+    """
+    Update a ticket with relationships eagerly loaded.
+    
+    Only ticket columns in _TICKET_UPDATABLE_COLUMNS are written; other
+    keyword arguments are ignored. None values are written explicitly.
+    """
+    session = _get_ticket_session()
     try:
-        ticket = session.query(Ticket).options(
-            joinedload(Ticket.assigned_user),
-            joinedload(Ticket.creator),
-            joinedload(Ticket.images).joinedload(TicketImage.uploader)
-        ).filter(Ticket.ticket_id == ticket_id).first()
+        values = {key: value for key, value in kwargs.items() if key in _TICKET_UPDATABLE_COLUMNS}
+        values['updated_at'] = datetime.utcnow()
         
-        if not ticket:
+        # Single UPDATE statement - no need to load the row first
+        result = session.execute(
+            Ticket.__table__.update()
+            .where(Ticket.__table__.c.ticket_id == ticket_id)
+            .values(**values)
+        )
+        if result.rowcount == 0:
+            session.rollback()
             return None
-        
-        for key, value in kwargs.items():
-            if hasattr(ticket, key):
-                # Allow setting None values explicitly
-                setattr(ticket, key, value)
-        
-        ticket.updated_at = datetime.utcnow()
         session.commit()
-        session.refresh(ticket)
         
-        # Re-query with eager loading to get fresh relationships
-        ticket = session.query(Ticket).options(
+        ticket = session.get(Ticket, ticket_id, options=[
             joinedload(Ticket.assigned_user),
             joinedload(Ticket.creator),
-            joinedload(Ticket.images).joinedload(TicketImage.uploader)
-        ).filter(Ticket.ticket_id == ticket_id).first()
+            selectinload(Ticket.images).joinedload(TicketImage.uploader),
+            selectinload(Ticket.listings),
+            raiseload('*')
+        ])
         
-        if ticket:
-            # Access relationships while session is open to populate them
-            _ = ticket.assigned_user
-            _ = ticket.creator
-            _ = ticket.images  # Access images while session is open
-            # Access uploader for each image while session is open
-            for img in ticket.images:
-                _ = img.uploader
-            
-            # Expunge to detach from session but keep loaded relationships
-            session.expunge(ticket)
-            _safe_expunge(session, ticket.assigned_user)
-            _safe_expunge(session, ticket.creator)
-            for img in ticket.images:
-                _safe_expunge(session, img.uploader)
-                _safe_expunge(session, img)
+        # Detach everything from the session but keep loaded relationships
+        session.expunge_all()
         
         return ticket
     except Exception as e:
@@ -1152,15 +1319,21 @@ def update_ticket(ticket_id: int, **kwargs) -> Optional[Ticket]:
 
 
 def delete_ticket(ticket_id: int) -> bool:
-    """Delete a ticket."""
-    session = get_session()
+    """Delete a ticket.
+    
+    Comments, tags, images and listing links are removed by the database's
+    ON DELETE CASCADE foreign keys, so this is a single DELETE statement.
+    """
+    session = _get_ticket_session()
     try:
-        ticket = session.query(Ticket).filter(Ticket.ticket_id == ticket_id).first()
-        if ticket:
-            session.delete(ticket)
-            session.commit()
-            return True
-        return False
+        result = session.execute(
+            Ticket.__table__.delete().where(Ticket.__table__.c.ticket_id == ticket_id)
+        )
+        if result.rowcount == 0:
+            session.rollback()
+            return False
+        session.commit()
+        return True
     except Exception as e:
         session.rollback()
         raise e
@@ -1170,8 +1343,7 @@ def delete_ticket(ticket_id: int) -> bool:
 
 def add_ticket_comment(ticket_id: int, user_id: int, comment_text: str) -> TicketComment:
     """Add a comment to a ticket with relationships eagerly loaded."""
-    from sqlalchemy.orm import joinedload
-    session = get_session()
+    session = _get_ticket_session()
     try:
         comment = TicketComment(
             ticket_id=ticket_id,
@@ -1181,33 +1353,19 @@ def add_ticket_comment(ticket_id: int, user_id: int, comment_text: str) -> Ticke
         session.add(comment)
         
         # Update ticket's updated_at timestamp
-        ticket = session.query(Ticket).filter(Ticket.ticket_id == ticket_id).first()
+        ticket = session.get(Ticket, ticket_id)
         if ticket:
             ticket.updated_at = datetime.utcnow()
         
-        session.commit()
-        comment_id = comment.comment_id
+        # Populate relationships in place instead of re-querying after commit
+        # (a new comment has no images yet)
+        set_committed_value(comment, 'user', session.get(User, user_id))
+        set_committed_value(comment, 'images', [])
         
-        # Re-query with eager loading to get relationships
-        comment = session.query(TicketComment).options(
-            joinedload(TicketComment.user),
-            joinedload(TicketComment.images).joinedload(CommentImage.uploader)
-        ).filter(TicketComment.comment_id == comment_id).first()
+        session.commit()
         
-        if comment:
-            # Access relationships while session is open to populate them
-            _ = comment.user
-            _ = comment.images  # Access images while session is open
-            # Access uploader for each image while session is open
-            for img in comment.images:
-                _ = img.uploader
-            
-            # Expunge to detach from session but keep loaded relationships
-            session.expunge(comment)
-            _safe_expunge(session, comment.user)
-            for img in comment.images:
-                _safe_expunge(session, img.uploader)
-                _safe_expunge(session, img)
+        # Detach everything from the session but keep loaded relationships
+        session.expunge_all()
         
         return comment
     except Exception as e:
@@ -1217,30 +1375,86 @@ def add_ticket_comment(ticket_id: int, user_id: int, comment_text: str) -> Ticke
         session.close()
 
 
+def add_ticket_comments_bulk(rows: List[dict]) -> int:
+    """
+    Insert many ticket comments in one executemany round trip.
+    
+    Meant for imports and replays where the ORM objects are not needed;
+    use add_ticket_comment() for a single comment.
+    
+    Args:
+        rows: Dicts with ticket_id, user_id, comment_text and optionally created_at
+    
+    Returns:
+        Number of comments inserted
+    """
+    if not rows:
+        return 0
+    
+    # executemany takes its columns from the first row, so give every row a
+    # created_at (otherwise values on later rows would be dropped or missing)
+    now = datetime.utcnow()
+    rows = [row if row.get('created_at') else {**row, 'created_at': now} for row in rows]
+    
+    session = _get_ticket_session()
+    try:
+        session.execute(TicketComment.__table__.insert(), rows)
+        # Bump updated_at once per ticket, as add_ticket_comment does per comment
+        ticket_ids = {row['ticket_id'] for row in rows}
+        session.execute(
+            Ticket.__table__.update()
+            .where(Ticket.__table__.c.ticket_id.in_(ticket_ids))
+            .values(updated_at=now)
+        )
+        session.commit()
+        return len(rows)
+    except Exception as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
+
+def add_activity_logs_bulk(rows: List[dict]) -> int:
+    """
+    Insert many activity log entries in one executemany round trip.
+    
+    Args:
+        rows: Dicts with user_id, activity_type, entity_type, entity_id, action,
+            activity_metadata and created_at
+    
+    Returns:
+        Number of entries inserted
+    """
+    if not rows:
+        return 0
+    
+    session = _get_ticket_session()
+    try:
+        session.execute(ActivityLog.__table__.insert(), rows)
+        session.commit()
+        return len(rows)
+    except Exception as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
+
 def get_ticket_comments(ticket_id: int) -> List[TicketComment]:
     """Get all comments for a ticket with relationships eagerly loaded."""
-    from sqlalchemy.orm import joinedload
-    session = get_session()
+    session = _get_ticket_session()
     try:
         comments = session.query(TicketComment).options(
-            joinedload(TicketComment.user),
-            joinedload(TicketComment.images).joinedload(CommentImage.uploader)
+            selectinload(TicketComment.user),
+            selectinload(TicketComment.images).selectinload(CommentImage.uploader),
+            raiseload('*')
         ).filter(
             TicketComment.ticket_id == ticket_id
         ).order_by(TicketComment.created_at.asc()).all()
         
-        # Access relationships while session is open and expunge to detach
-        for comment in comments:
-            _ = comment.user
-            _ = comment.images
-            # Access uploader for each image while session is open
-            for img in comment.images:
-                _ = img.uploader
-            session.expunge(comment)
-            _safe_expunge(session, comment.user)
-            for img in comment.images:
-                _safe_expunge(session, img.uploader)
-                _safe_expunge(session, img)
+        # Detach (relationships were eager-loaded above)
+        session.expunge_all()
         
         return comments
     finally:
@@ -1249,35 +1463,27 @@ def get_ticket_comments(ticket_id: int) -> List[TicketComment]:
 
 def delete_ticket_comment(comment_id: int) -> bool:
     """Delete a ticket comment."""
-    from pathlib import Path
-    from dashboard.config import TICKET_IMAGES_DIR
-    import os
-    
-    session = get_session()
+    session = _get_ticket_session()
     try:
         # Load comment with images
-        from sqlalchemy.orm import joinedload
         comment = session.query(TicketComment).options(
             joinedload(TicketComment.images)
         ).filter(TicketComment.comment_id == comment_id).first()
         
         if comment:
-            # Delete associated image files
+            # Delete associated image files (remove directly rather than stat first;
+            # a file that is already gone is fine)
+            images_dir = str(config.TICKET_IMAGES_DIR)
             for img in comment.images:
-                if img.file_path:
-                    file_path = Path(TICKET_IMAGES_DIR) / img.file_path
-                    if file_path.exists():
-                        try:
-                            os.remove(file_path)
-                        except Exception:
-                            pass
-                if img.thumbnail_path:
-                    thumb_path = Path(TICKET_IMAGES_DIR) / img.thumbnail_path
-                    if thumb_path.exists():
-                        try:
-                            os.remove(thumb_path)
-                        except Exception:
-                            pass
+                for rel_path in (img.file_path, img.thumbnail_path):
+                    if not rel_path:
+                        continue
+                    try:
+                        os.remove(os.path.join(images_dir, rel_path))
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        logger.warning(f"Error deleting comment image file {rel_path}: {e}")
             
             # Delete the comment (cascade will handle CommentImage records)
             session.delete(comment)
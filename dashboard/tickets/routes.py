@@ -7,7 +7,12 @@ import sys
 import os
 import logging
 from datetime import datetime, date, timedelta
-from flask import Blueprint, render_template, jsonify, request, redirect, url_for
+from flask import Blueprint, render_template, jsonify, request, redirect, url_for, current_app
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup, falls back to jsonify()
+    orjson = None
 
 # Add parent directories to path
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -16,7 +21,8 @@ sys.path.insert(0, project_root)
 from dashboard.tickets.models import (
     Ticket, TicketComment, TicketTag, TicketImage, CommentImage, get_session, create_ticket, get_ticket,
     get_tickets, update_ticket, delete_ticket, add_ticket_comment, get_ticket_comments, delete_ticket_comment,
-    init_ticket_database, TICKET_CATEGORIES
+    init_ticket_database, issue_title_filter, filter_tickets_by_issue_title, query_ticket_rows, ticket_rows_to_dicts,
+    TICKET_CATEGORIES, VALID_TICKET_STATUSES, VALID_TICKET_PRIORITIES, VALID_TICKET_CATEGORIES
 )
 from dashboard.tickets.recurring_tasks import process_recurring_tasks, get_next_occurrence_date, get_admin_user
 from dashboard.tickets.image_utils import save_uploaded_image
@@ -34,9 +40,16 @@ import dashboard.config as config
 
 tickets_bp = Blueprint('tickets', __name__, url_prefix='/tickets')
 
-# Constants
-TICKET_STATUSES = ['Open', 'Assigned', 'In Progress', 'Blocked', 'Resolved', 'Closed']
-TICKET_PRIORITIES = ['Low', 'Medium', 'High', 'Critical']
+
+def _json_response(obj):
+    """
+    jsonify() equivalent for large payloads (ticket lists, ticket detail with comments).
+    
+    Uses orjson when installed (sorted keys like jsonify), otherwise jsonify().
+    """
+    if orjson is None:
+        return jsonify(obj)
+    return current_app.response_class(orjson.dumps(obj, option=orjson.OPT_SORT_KEYS), mimetype='application/json')
 
 
 @tickets_bp.route('/')
@@ -353,23 +366,16 @@ def api_list_tickets():
                 # Apply the search filter - match if any condition is true
                 query = query.filter(or_(*search_conditions))
         
-        tickets = query.order_by(Ticket.created_at.desc()).all()
+        # Filter by issue_title: narrow candidates in SQL, then match exactly in Python
+        if issue_title:
+            query = query.filter(issue_title_filter(issue_title))
+        
+        # Plain column rows (with user names joined in) - the response only needs
+        # dicts, so skip building ORM objects for every ticket
+        tickets = query_ticket_rows(query.order_by(Ticket.created_at.desc()))
         
-        # Filter by issue_title in Python if provided
         if issue_title:
-            issue_title_normalized = issue_title.strip().lower()
-            filtered_tickets = []
-            for t in tickets:
-                if t.issue_title:
-                    ticket_issue_normalized = t.issue_title.strip().lower()
-                    if ticket_issue_normalized == issue_title_normalized:
-                        filtered_tickets.append(t)
-                    elif (len(ticket_issue_normalized) > 0 and len(issue_title_normalized) > 0):
-                        shorter = min(ticket_issue_normalized, issue_title_normalized, key=len)
-                        longer = max(ticket_issue_normalized, issue_title_normalized, key=len)
-                        if len(shorter) >= len(longer) * 0.8 and shorter in longer:
-                            filtered_tickets.append(t)
-            tickets = filtered_tickets
+            tickets = filter_tickets_by_issue_title(tickets, issue_title)
         
         # Get listing names for display (only for tickets with listing_id)
         listing_map = {}
@@ -405,26 +411,12 @@ def api_list_tickets():
                             'is_inherited': tt.is_inherited
                         })
         
-        # Get all listings for tickets (from TicketListing junction table)
-        from dashboard.tickets.models import TicketListing
-        ticket_listings_map = {}
-        if ticket_ids:
-            ticket_listings = session.query(TicketListing).filter(
-                TicketListing.ticket_id.in_(ticket_ids)
-            ).all()
-            for tl in ticket_listings:
-                if tl.ticket_id not in ticket_listings_map:
-                    ticket_listings_map[tl.ticket_id] = []
-                ticket_listings_map[tl.ticket_id].append(tl.listing_id)
+        # Ticket dicts, with listing ids (junction table or fallback to listing_id) and images
+        ticket_dicts = ticket_rows_to_dicts(session, tickets)
         
         result = []
-        for ticket in tickets:
-            ticket_dict = ticket.to_dict(include_comments=False)
-            
-            # Get listings for this ticket (from junction table or fallback to listing_id)
-            listing_ids = ticket_listings_map.get(ticket.ticket_id, [])
-            if not listing_ids and ticket.listing_id:
-                listing_ids = [ticket.listing_id]
+        for ticket, ticket_dict in zip(tickets, ticket_dicts):
+            listing_ids = ticket_dict['listing_ids']
             
             # Include all listings in the response
             if listing_ids:
@@ -453,7 +445,7 @@ def api_list_tickets():
             
             result.append(ticket_dict)
         
-        return jsonify(result)
+        return _json_response(result)
     finally:
         session.close()
         main_session.close()
@@ -511,7 +503,7 @@ def api_get_ticket(ticket_id):
         # For backward compatibility, also include first listing as 'listing'
         ticket_dict['listing'] = ticket_dict['listings'][0]
     
-    return jsonify(ticket_dict)
+    return _json_response(ticket_dict)
 
 
 @tickets_bp.route('/api/tickets', methods=['POST'])
@@ -574,7 +566,7 @@ def api_create_ticket():
     category = data.get('category', 'other')
     
     # Validate category
-    if category not in TICKET_CATEGORIES:
+    if category not in VALID_TICKET_CATEGORIES:
         return jsonify({'error': f'Invalid category. Must be one of: {", ".join(TICKET_CATEGORIES)}'}), 400
     
     due_date_str = data.get('due_date')
@@ -756,21 +748,8 @@ def api_create_ticket():
             recurrence_annual_dates=recurrence_annual_dates
         )
         
-        # Get the ticket again with relationships loaded to avoid lazy loading issues
-        from sqlalchemy.orm import joinedload
-        session = get_session()
-        try:
-            ticket_with_rels = session.query(Ticket).options(
-                joinedload(Ticket.assigned_user),
-                joinedload(Ticket.creator)
-            ).filter(Ticket.ticket_id == ticket.ticket_id).first()
-            
-            if ticket_with_rels:
-                ticket_dict = ticket_with_rels.to_dict(include_comments=False)
-            else:
-                ticket_dict = ticket.to_dict(include_comments=False)
-        finally:
-            session.close()
+        # create_ticket() returns the ticket with users, listings and images populated
+        ticket_dict = ticket.to_dict(include_comments=False)
         
         # Log ticket creation activity
         try:
@@ -882,15 +861,15 @@ def api_update_ticket(ticket_id):
             update_data['assigned_user_id'] = None
     
     if 'status' in data:
-        if data['status'] in TICKET_STATUSES:
+        if data['status'] in VALID_TICKET_STATUSES:
             update_data['status'] = data['status']
     
     if 'priority' in data:
-        if data['priority'] in TICKET_PRIORITIES:
+        if data['priority'] in VALID_TICKET_PRIORITIES:
             update_data['priority'] = data['priority']
     
     if 'category' in data:
-        if data['category'] in TICKET_CATEGORIES:
+        if data['category'] in VALID_TICKET_CATEGORIES:
             update_data['category'] = data['category']
         else:
             return jsonify({'error': f'Invalid category. Must be one of: {", ".join(TICKET_CATEGORIES)}'}), 400
@@ -1229,27 +1208,8 @@ def api_update_ticket(ticket_id):
                 logger = logging.getLogger(__name__)
                 logger.warning(f"Error sending notifications: {e}", exc_info=True)
             
-            # Eagerly load listings before calling to_dict() to avoid detached instance error
-            from sqlalchemy.orm import joinedload
-            session = get_session()
-            try:
-                ticket_with_listings = session.query(Ticket).options(
-                    joinedload(Ticket.assigned_user),
-                    joinedload(Ticket.creator),
-                    joinedload(Ticket.listings)
-                ).filter(Ticket.ticket_id == updated_ticket.ticket_id).first()
-                
-                if ticket_with_listings:
-                    # Access relationships to populate them
-                    _ = ticket_with_listings.assigned_user
-                    _ = ticket_with_listings.creator
-                    _ = ticket_with_listings.listings
-                    return jsonify(ticket_with_listings.to_dict(include_comments=False))
-                else:
-                    # Fallback to updated_ticket if query fails
-                    return jsonify(updated_ticket.to_dict(include_comments=False))
-            finally:
-                session.close()
+            # update_ticket() returns the ticket with users, listings and images loaded
+            return jsonify(updated_ticket.to_dict(include_comments=False))
         return jsonify({'error': 'Failed to update ticket'}), 500
     except Exception as e:
         import logging
@@ -1312,7 +1272,7 @@ def api_get_comments(ticket_id):
         return jsonify({'error': 'Ticket not found'}), 404
     
     comments = get_ticket_comments(ticket_id)
-    return jsonify([comment.to_dict() for comment in comments])
+    return _json_response([comment.to_dict() for comment in comments])
 
 
 @tickets_bp.route('/api/tickets/<int:ticket_id>/comments', methods=['POST'])
@@ -1507,6 +1467,37 @@ def api_suggest_ticket():
         return jsonify({'error': str(e)}), 500
 
 
+@tickets_bp.route('/api/tickets/suggest/batch', methods=['POST'])
+@approved_required
+def api_suggest_tickets_batch():
+    """Generate AI suggestions for several issues at once."""
+    from dashboard.tickets.ai_suggestions import generate_ticket_suggestions_batch, validate_suggestion_batch_items
+    
+    data = request.get_json()
+    items = data.get('items') if isinstance(data, dict) else None
+    error = validate_suggestion_batch_items(items)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    try:
+        suggestions = generate_ticket_suggestions_batch(items)
+        
+        # Same shape as api_suggest_ticket, one entry per item
+        results = [{
+            'title': suggestion.get('title', ''),
+            'description': suggestion.get('description', ''),
+            'priority': suggestion.get('priority', 'Medium'),
+            'category': suggestion.get('category', 'other'),
+            'due_date': suggestion.get('suggested_due_date', '')
+        } for suggestion in suggestions]
+        
+        return jsonify({'suggestions': results})
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
 @tickets_bp.route('/api/listings/<int:listing_id>/issues', methods=['GET'])
 @approved_required
 def api_get_listing_issues(listing_id):
@@ -1758,18 +1749,12 @@ def api_upload_ticket_image(ticket_id):
         image_id = ticket_image.image_id
         
         # Re-query with eager loading to get relationships
-        from sqlalchemy.orm import joinedload
         ticket_image = session.query(TicketImage).options(
             joinedload(TicketImage.uploader)
         ).filter(TicketImage.image_id == image_id).first()
         
-        if ticket_image:
-            # Access relationship while session is open
-            _ = ticket_image.uploader
-            # Expunge to detach from session but keep loaded relationship
-            session.expunge(ticket_image)
-            from dashboard.tickets.models import _safe_expunge
-            _safe_expunge(session, ticket_image.uploader)
+        # Detach from session but keep loaded relationship
+        session.expunge_all()
         
         return jsonify(ticket_image.to_dict()), 201
         
@@ -1807,7 +1792,6 @@ def api_upload_ticket_image(ticket_id):
 @approved_required
 def api_get_ticket_images(ticket_id):
     """Get all images for a ticket."""
-    from sqlalchemy.orm import joinedload
     session = get_session()
     try:
         ticket = session.query(Ticket).filter(Ticket.ticket_id == ticket_id).first()
@@ -1820,12 +1804,8 @@ def api_get_ticket_images(ticket_id):
             TicketImage.ticket_id == ticket_id
         ).order_by(TicketImage.created_at.asc()).all()
         
-        # Access relationships while session is open
-        for img in images:
-            _ = img.uploader
-            session.expunge(img)
-            from dashboard.tickets.models import _safe_expunge
-            _safe_expunge(session, img.uploader)
+        # Detach from session but keep loaded relationships
+        session.expunge_all()
         
         result = [img.to_dict() for img in images]
         return jsonify(result)
@@ -2026,18 +2006,12 @@ def api_upload_comment_image(comment_id):
         )
         
         # Re-query with eager loading to get relationships
-        from sqlalchemy.orm import joinedload
         comment_image = session.query(CommentImage).options(
             joinedload(CommentImage.uploader)
         ).filter(CommentImage.image_id == image_id).first()
         
-        if comment_image:
-            # Access relationship while session is open
-            _ = comment_image.uploader
-            # Expunge to detach from session but keep loaded relationship
-            session.expunge(comment_image)
-            from dashboard.tickets.models import _safe_expunge
-            _safe_expunge(session, comment_image.uploader)
+        # Detach from session but keep loaded relationship
+        session.expunge_all()
         
         # Log the returned image data
         image_dict = comment_image.to_dict()
@@ -2082,7 +2056,6 @@ def api_upload_comment_image(comment_id):
 @approved_required
 def api_get_comment_images(comment_id):
     """Get all images for a comment."""
-    from sqlalchemy.orm import joinedload
     session = get_session()
     try:
         comment = session.query(TicketComment).filter(TicketComment.comment_id == comment_id).first()
@@ -2095,12 +2068,8 @@ def api_get_comment_images(comment_id):
             CommentImage.comment_id == comment_id
         ).order_by(CommentImage.created_at.asc()).all()
         
-        # Access relationships while session is open
-        for img in images:
-            _ = img.uploader
-            session.expunge(img)
-            from dashboard.tickets.models import _safe_expunge
-            _safe_expunge(session, img.uploader)
+        # Detach from session but keep loaded relationships
+        session.expunge_all()
         
         result = [img.to_dict() for img in images]
         return jsonify(result)
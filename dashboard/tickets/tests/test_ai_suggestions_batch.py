@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Unit tests for batch ticket suggestions.
+"""
+
+import json
+import unittest
+from unittest.mock import patch
+
+import sys
+import os
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, project_root)
+
+from dashboard.tickets import ai_suggestions
+from dashboard.tickets.ai_suggestions import (
+    SUGGESTION_BATCH_MAX_ITEMS, generate_ticket_suggestions_batch, validate_suggestion_batch_items,
+    _basic_suggestion, _cache_suggestion, _suggestion_cache_key
+)
+
+
+def _item(listing_id, issue_title, issue_details=''):
+    return {'listing_id': listing_id, 'issue_title': issue_title, 'issue_details': issue_details}
+
+
+def _response(title):
+    return json.dumps({
+        'title': title,
+        'description': f"Fix {title}",
+        'priority': 'High',
+        'category': 'maintenance',
+        'suggested_due_date_days': None
+    })
+
+
+class TestGenerateTicketSuggestionsBatch(unittest.TestCase):
+    """Tests for generate_ticket_suggestions_batch()."""
+    
+    def setUp(self):
+        ai_suggestions._suggestion_cache.clear()
+        patchers = [
+            patch.object(ai_suggestions, '_has_api_key', return_value=True),
+            patch.object(ai_suggestions, '_get_listing_label', return_value=('Beach House', '1 Main St')),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(ai_suggestions._suggestion_cache.clear)
+    
+    def _run_batch(self, items, responses):
+        """Run a batch with _request_suggestions returning responses (one per uncached prompt)."""
+        calls = []
+        
+        async def fake_request(prompts):
+            calls.append(prompts)
+            return responses
+        
+        with patch.object(ai_suggestions, '_request_suggestions', fake_request):
+            results = generate_ticket_suggestions_batch(items)
+        return results, calls
+    
+    def test_results_keep_item_order(self):
+        """Test results line up with the items they were requested for."""
+        items = [_item(1, 'Broken AC'), _item(2, 'Leaking sink'), _item(3, 'No WiFi')]
+        results, calls = self._run_batch(items, [_response('AC'), _response('Sink'), _response('WiFi')])
+        self.assertEqual([r['title'] for r in results], ['AC', 'Sink', 'WiFi'])
+        self.assertEqual(len(calls[0]), 3)
+    
+    def test_cached_items_skip_the_request(self):
+        """Test only uncached items are sent, and cached results fill their own slots."""
+        cached = json.loads(_response('Cached sink'))
+        _cache_suggestion(_suggestion_cache_key(2, 'Leaking sink', ''), cached)
+        items = [_item(1, 'Broken AC'), _item(2, 'Leaking sink'), _item(3, 'No WiFi')]
+        results, calls = self._run_batch(items, [_response('AC'), _response('WiFi')])
+        self.assertEqual([r['title'] for r in results], ['AC', 'Cached sink', 'WiFi'])
+        self.assertEqual(len(calls[0]), 2)
+    
+    def test_all_cached_makes_no_request(self):
+        """Test a fully cached batch never calls OpenAI."""
+        _cache_suggestion(_suggestion_cache_key(1, 'Broken AC', ''), json.loads(_response('AC')))
+        results, calls = self._run_batch([_item(1, 'Broken AC')], [])
+        self.assertEqual(results[0]['title'], 'AC')
+        self.assertEqual(calls, [])
+    
+    def test_failed_item_falls_back_to_basic_suggestion(self):
+        """Test a failed or unparseable response only affects its own item."""
+        items = [_item(1, 'Broken AC', 'Unit is dead'), _item(2, 'Leaking sink'), _item(3, 'No WiFi')]
+        results, _ = self._run_batch(items, [RuntimeError('timeout'), _response('Sink'), 'not json'])
+        self.assertEqual(results[0], _basic_suggestion('Broken AC', 'Unit is dead'))
+        self.assertEqual(results[1]['title'], 'Sink')
+        self.assertEqual(results[2], _basic_suggestion('No WiFi', ''))
+        # Fallbacks are not cached
+        self.assertIsNone(ai_suggestions._get_cached_suggestion(_suggestion_cache_key(1, 'Broken AC', 'Unit is dead')))
+    
+    def test_rejects_batches_over_the_limit(self):
+        """Test oversized batches raise before any request is made."""
+        items = [_item(i, f"Issue {i}") for i in range(1, SUGGESTION_BATCH_MAX_ITEMS + 2)]
+        with self.assertRaises(ValueError):
+            self._run_batch(items, [])
+
+
+class TestValidateSuggestionBatchItems(unittest.TestCase):
+    """Tests for validate_suggestion_batch_items()."""
+    
+    def test_valid_items(self):
+        """Test well-formed items pass, with or without issue_details."""
+        self.assertIsNone(validate_suggestion_batch_items([_item(1, 'Broken AC'), {'listing_id': 2, 'issue_title': 'Sink'}]))
+    
+    def test_size_limit(self):
+        """Test the item count is capped at SUGGESTION_BATCH_MAX_ITEMS."""
+        items = [_item(1, 'Broken AC')] * SUGGESTION_BATCH_MAX_ITEMS
+        self.assertIsNone(validate_suggestion_batch_items(items))
+        self.assertIsNotNone(validate_suggestion_batch_items(items + [_item(1, 'Broken AC')]))
+    
+    def test_rejects_missing_or_empty_items(self):
+        """Test items must be a non-empty list."""
+        for items in (None, [], {'listing_id': 1}, 'items'):
+            self.assertIsNotNone(validate_suggestion_batch_items(items))
+    
+    def test_rejects_wrong_field_types(self):
+        """Test listing_id must be an int and the issue fields strings."""
+        for item in (
+            'not a dict',
+            _item('1', 'Broken AC'),
+            _item([1], 'Broken AC'),
+            _item(True, 'Broken AC'),
+            _item(1, ['Broken AC']),
+            _item(1, '   '),
+            _item(1, 'Broken AC', {'text': 'x'}),
+        ):
+            self.assertIsNotNone(validate_suggestion_batch_items([item]), item)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Unit tests for issue title matching used by the ticket list filters.
+"""
+
+import unittest
+from types import SimpleNamespace
+
+import sys
+import os
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, project_root)
+
+from dashboard.tickets.models import filter_tickets_by_issue_title
+
+
+def _tickets(*titles):
+    return [SimpleNamespace(ticket_id=i, issue_title=title) for i, title in enumerate(titles, 1)]
+
+
+class TestFilterTicketsByIssueTitle(unittest.TestCase):
+    """Tests for filter_tickets_by_issue_title()."""
+    
+    def test_exact_match_ignores_case_and_whitespace(self):
+        """Test trimmed, case-insensitive exact matches."""
+        tickets = _tickets('  Broken AC unit ', 'Leaking sink')
+        matched = filter_tickets_by_issue_title(tickets, 'broken ac UNIT')
+        self.assertEqual([t.ticket_id for t in matched], [1])
+    
+    def test_substring_within_length_ratio(self):
+        """Test containment only matches when the shorter title is at least 80% of the longer."""
+        tickets = _tickets('Broken AC unit', 'Broken AC', 'AC')
+        matched = filter_tickets_by_issue_title(tickets, 'Broken AC uni')
+        self.assertEqual([t.ticket_id for t in matched], [1])
+    
+    def test_same_length_different_title_does_not_match(self):
+        """Test titles of equal length only match when they are equal."""
+        tickets = _tickets('sink 50%', 'leak a_b')
+        matched = filter_tickets_by_issue_title(tickets, 'leak a_b')
+        self.assertEqual([t.ticket_id for t in matched], [2])
+    
+    def test_skips_tickets_without_issue_title(self):
+        """Test tickets with an empty issue title are ignored."""
+        tickets = _tickets(None, '', 'Broken AC')
+        matched = filter_tickets_by_issue_title(tickets, 'Broken AC')
+        self.assertEqual([t.ticket_id for t in matched], [3])
+
+
+if __name__ == '__main__':
+    unittest.main()
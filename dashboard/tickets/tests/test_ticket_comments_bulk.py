@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Unit tests for bulk ticket comment inserts.
+"""
+
+import unittest
+from datetime import datetime
+
+import sys
+import os
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, project_root)
+
+from dashboard.tickets.models import Ticket, TicketComment, add_ticket_comments_bulk, create_ticket, _get_ticket_session
+from dashboard.tickets.tests.ticket_db import use_ticket_test_database, add_user
+
+
+class TestAddTicketCommentsBulk(unittest.TestCase):
+    """Tests for add_ticket_comments_bulk()."""
+    
+    def setUp(self):
+        use_ticket_test_database(self)
+        add_user(1, 'Alice')
+        self.ticket_ids = [
+            create_ticket(issue_title=f"Issue {i}", title=f"Ticket {i}", created_by=1).ticket_id
+            for i in range(3)
+        ]
+        # Backdate updated_at so the bump is visible
+        session = _get_ticket_session()
+        try:
+            session.query(Ticket).update({Ticket.updated_at: datetime(2024, 1, 1)})
+            session.commit()
+        finally:
+            session.close()
+    
+    def _updated_at(self):
+        session = _get_ticket_session()
+        try:
+            return dict(session.query(Ticket.ticket_id, Ticket.updated_at))
+        finally:
+            session.close()
+    
+    def test_inserts_all_rows(self):
+        """Test every row is inserted and the count is returned."""
+        first, second, _ = self.ticket_ids
+        rows = [
+            {'ticket_id': first, 'user_id': 1, 'comment_text': 'one'},
+            {'ticket_id': first, 'user_id': 1, 'comment_text': 'two'},
+            {'ticket_id': second, 'user_id': 1, 'comment_text': 'three', 'created_at': datetime(2024, 2, 1)},
+        ]
+        self.assertEqual(add_ticket_comments_bulk(rows), 3)
+        
+        session = _get_ticket_session()
+        try:
+            comments = session.query(TicketComment).order_by(TicketComment.comment_id).all()
+            self.assertEqual(
+                [(c.ticket_id, c.comment_text) for c in comments],
+                [(first, 'one'), (first, 'two'), (second, 'three')]
+            )
+            self.assertEqual(comments[2].created_at, datetime(2024, 2, 1))
+            self.assertIsNotNone(comments[0].created_at)
+        finally:
+            session.close()
+    
+    def test_bumps_updated_at_of_commented_tickets_only(self):
+        """Test updated_at moves for tickets that got comments and no others."""
+        first, second, untouched = self.ticket_ids
+        add_ticket_comments_bulk([
+            {'ticket_id': first, 'user_id': 1, 'comment_text': 'one'},
+            {'ticket_id': second, 'user_id': 1, 'comment_text': 'two'},
+        ])
+        updated_at = self._updated_at()
+        self.assertGreater(updated_at[first], datetime(2024, 1, 1))
+        self.assertGreater(updated_at[second], datetime(2024, 1, 1))
+        self.assertEqual(updated_at[untouched], datetime(2024, 1, 1))
+    
+    def test_empty_input(self):
+        """Test an empty list inserts nothing and touches no tickets."""
+        self.assertEqual(add_ticket_comments_bulk([]), 0)
+        self.assertEqual(set(self._updated_at().values()), {datetime(2024, 1, 1)})
+        
+        session = _get_ticket_session()
+        try:
+            self.assertEqual(session.query(TicketComment).count(), 0)
+        finally:
+            session.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
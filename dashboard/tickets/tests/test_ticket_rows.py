@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the row-based ticket list serialization.
+"""
+
+import unittest
+from datetime import date
+
+import sys
+import os
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, project_root)
+
+from dashboard.tickets.models import (
+    Ticket, TicketImage, create_ticket, get_ticket, query_ticket_rows, ticket_rows_to_dicts, _get_ticket_session
+)
+from dashboard.tickets.tests.ticket_db import use_ticket_test_database, add_user
+
+
+class TestTicketRowsToDicts(unittest.TestCase):
+    """Tests that query_ticket_rows() + ticket_rows_to_dicts() match Ticket.to_dict()."""
+    
+    def setUp(self):
+        use_ticket_test_database(self)
+        add_user(1, 'Alice')
+        add_user(2, 'Bob')
+    
+    def _row_dicts(self):
+        session = _get_ticket_session()
+        try:
+            rows = query_ticket_rows(session.query(Ticket).order_by(Ticket.ticket_id))
+            return ticket_rows_to_dicts(session, rows)
+        finally:
+            session.close()
+    
+    def _add_image(self, ticket_id, file_name, uploaded_by):
+        session = _get_ticket_session()
+        try:
+            session.add(TicketImage(
+                ticket_id=ticket_id, file_path=f"{ticket_id}/{file_name}", file_name=file_name,
+                file_size=100, mime_type='image/jpeg', width=10, height=10,
+                thumbnail_path=f"{ticket_id}/thumb_{file_name}", uploaded_by=uploaded_by
+            ))
+            session.commit()
+        finally:
+            session.close()
+    
+    def _legacy_ticket(self, listing_id):
+        """Create a ticket with listing_id but no ticket_listings rows (pre junction table)."""
+        session = _get_ticket_session()
+        try:
+            ticket = Ticket(listing_id=listing_id, issue_title='Old issue', title='Old ticket', created_by=2)
+            session.add(ticket)
+            session.commit()
+            return ticket.ticket_id
+        finally:
+            session.close()
+    
+    def test_matches_to_dict(self):
+        """Test users, listing ids (including the listing_id fallback) and images match to_dict()."""
+        assigned = create_ticket(
+            listing_ids=[10, 11], issue_title='Broken AC', title='Fix AC', description='Unit is dead',
+            assigned_user_id=2, created_by=1, priority='High', category='maintenance',
+            due_date=date(2024, 5, 1)
+        ).ticket_id
+        unassigned = create_ticket(issue_title='General', title='General task', created_by=2).ticket_id
+        legacy = self._legacy_ticket(listing_id=12)
+        self._add_image(assigned, 'a.jpg', uploaded_by=1)
+        self._add_image(assigned, 'b.jpg', uploaded_by=2)
+        
+        row_dicts = self._row_dicts()
+        orm_dicts = [get_ticket(ticket_id).to_dict() for ticket_id in (assigned, unassigned, legacy)]
+        self.assertEqual(row_dicts, orm_dicts)
+        
+        by_id = {d['ticket_id']: d for d in row_dicts}
+        self.assertEqual(by_id[assigned]['assigned_user_name'], 'Bob')
+        self.assertEqual(by_id[assigned]['created_by_email'], 'alice@example.com')
+        self.assertEqual(sorted(by_id[assigned]['listing_ids']), [10, 11])
+        self.assertEqual([img['uploaded_by_name'] for img in by_id[assigned]['images']], ['Alice', 'Bob'])
+        self.assertIsNone(by_id[unassigned]['assigned_user_name'])
+        self.assertEqual(by_id[unassigned]['listing_ids'], [])
+        self.assertEqual(by_id[legacy]['listing_ids'], [12])
+        self.assertEqual(by_id[legacy]['images'], [])
+    
+    def test_no_rows(self):
+        """Test an empty result converts to an empty list."""
+        self.assertEqual(self._row_dicts(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
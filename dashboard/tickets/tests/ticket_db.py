@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+In-memory SQLite database for ticket model tests.
+
+The ticket helpers get their sessions from tickets.models._get_engine(); use_ticket_test_database()
+points that at a fresh in-memory database for the duration of a test.
+"""
+
+from datetime import datetime
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+import sys
+import os
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, project_root)
+
+import dashboard.tickets.models as ticket_models
+from dashboard.auth.models import Base, User
+from dashboard.tickets.models import Ticket, TicketComment, TicketListing, TicketTag, TicketImage, CommentImage
+from database.models import Base as MainBase, Listing, ListingTag, Tag
+
+# Tables the ticket CRUD helpers touch (activity_logs uses JSONB, which SQLite can't create)
+_TABLES = [
+    User.__table__, Ticket.__table__, TicketComment.__table__, TicketListing.__table__,
+    TicketTag.__table__, TicketImage.__table__, CommentImage.__table__,
+]
+
+# Main database tables read by create_ticket() for tag inheritance
+_MAIN_TABLES = [Listing.__table__, Tag.__table__, ListingTag.__table__]
+
+
+def create_ticket_test_engine():
+    """
+    Create an in-memory SQLite engine with the ticket, user and tag tables.
+    
+    When the models are schema-qualified (DATABASE_URL set), the users and
+    tickets schemas are attached as in-memory databases.
+    """
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_conn, connection_record):
+        if ticket_models._use_schemas:
+            for schema in ('users', 'tickets'):
+                dbapi_conn.execute(f"ATTACH DATABASE ':memory:' AS {schema}")
+        dbapi_conn.execute('PRAGMA foreign_keys=ON')
+    
+    Base.metadata.create_all(engine, tables=_TABLES)
+    MainBase.metadata.create_all(engine, tables=_MAIN_TABLES)
+    return engine
+
+
+def use_ticket_test_database(test_case):
+    """
+    Point the ticket helpers at a fresh test database until the test ends.
+    
+    Args:
+        test_case: unittest.TestCase to register the cleanup on
+    
+    Returns:
+        The test engine
+    """
+    engine = create_ticket_test_engine()
+    for patcher in (
+        patch.object(ticket_models, '_engine', engine),
+        patch.object(ticket_models, '_session_factory', None),
+    ):
+        patcher.start()
+        test_case.addCleanup(patcher.stop)
+    test_case.addCleanup(engine.dispose)
+    return engine
+
+
+def add_user(user_id: int, name: str, email: str = None) -> User:
+    """Insert a user into the test database and return it (detached)."""
+    session = ticket_models._get_ticket_session()
+    try:
+        user = User(user_id=user_id, name=name, email=email or f"{name.lower()}@example.com",
+                    role='user', is_approved=True, created_at=datetime(2024, 1, 1))
+        session.add(user)
+        session.commit()
+        session.expunge_all()
+        return user
+    finally:
+        session.close()
@@ -70,18 +70,9 @@ def run_all_migrations(engine=None):
             _migrate_documents_table(engine)
             _migrate_document_listings_table(engine)
             _migrate_document_tags_table(engine)
-            # Tickets DB migrations
-            from dashboard.tickets.models import (
-                _migrate_tickets_table,
-                _migrate_image_tables,
-                _migrate_tickets_recurring_table,
-                init_ticket_database
-            )
-            # Initialize tickets database and get engine
-            tickets_engine = init_ticket_database()
-            _migrate_tickets_table(tickets_engine)
-            _migrate_image_tables(tickets_engine)
-            _migrate_tickets_recurring_table(tickets_engine)
+            # Tickets DB migrations (init_ticket_database runs the ticket migrations)
+            from dashboard.tickets.models import init_ticket_database
+            init_ticket_database()
         else:
             # PostgreSQL migrations
             logger.info("Running PostgreSQL migrations...")
@@ -91,21 +82,13 @@ def run_all_migrations(engine=None):
             _migrate_documents_table(engine)
             _migrate_document_listings_table(engine)
             _migrate_document_tags_table(engine)
-            # Tickets DB migrations
-            from dashboard.tickets.models import (
-                _migrate_listing_id_nullable,
-                _migrate_tickets_recurring_table,
-                init_ticket_database
-            )
-            # Initialize tickets database and get engine
-            tickets_engine = init_ticket_database()
-            _migrate_listing_id_nullable(tickets_engine)
-            _migrate_tickets_recurring_table(tickets_engine)
-            # Note: Other migrations are SQLite-specific
+            # Tickets DB migrations (init_ticket_database runs the ticket migrations)
+            from dashboard.tickets.models import init_ticket_database
+            init_ticket_database()
         
         logger.info("Database migrations completed successfully")
         return True
-        
+    
     except Exception as e:
         logger.error(f"Error running migrations: {e}", exc_info=True)
         return False
@@ -322,6 +322,9 @@ class SyncLog(Base):
     """Sync log model - tracks all sync operations"""
     __tablename__ = 'sync_logs'
     __table_args__ = (
+        # Sync detail filters by sync_run_id and orders by started_at; status rollups filter by sync_run_id
+        Index('idx_sync_logs_run_id_started', 'sync_run_id', 'started_at'),
+        Index('idx_sync_logs_run_id_status', 'sync_run_id', 'status'),
         {'schema': 'public'} if os.getenv("DATABASE_URL") else {},
     )
     
@@ -626,6 +629,16 @@ def init_models(db_path: str):
                     except Exception:
                         # Index might already exist or table might not exist yet, ignore
                         pass
+                # Composite indexes for sync detail/status lookups (create_all skips existing tables)
+                for index_sql in (
+                    "CREATE INDEX IF NOT EXISTS idx_sync_logs_run_id_started ON public.sync_logs(sync_run_id, started_at)",
+                    "CREATE INDEX IF NOT EXISTS idx_sync_logs_run_id_status ON public.sync_logs(sync_run_id, status)",
+                ):
+                    try:
+                        conn.execute(sqlalchemy.text(index_sql))
+                    except Exception:
+                        # Table might not exist yet, ignore
+                        pass
             # For other databases, indexes should be created via schema.py or migrations
     
     # SQLite-specific migrations (skip for PostgreSQL)
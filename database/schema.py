@@ -326,6 +326,8 @@ def create_schema(db_path: str):
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_logs_status ON sync_logs(status)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_logs_started ON sync_logs(started_at)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_logs_run_id ON sync_logs(sync_run_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_logs_run_id_started ON sync_logs(sync_run_id, started_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_logs_run_id_status ON sync_logs(sync_run_id, status)")
     
     # 10. Sync Jobs Table
     cursor.execute("""